@@ -0,0 +1,237 @@
+#Pruebas de rendimiento por etapa con datos sintéticos deterministas (Datos_sinteticos.py).
+#Mide cada etapa de Vuelos_produccion, Lineas, Volumen y CorteLAS en varios tamaños, guarda los tiempos
+#en un JSON y, si se indica una referencia anterior, marca las etapas que se volvieron más lentas.
+#Uso: python Benchmark.py resultados.json [--referencia base.json] [--tamanos pequeno,mediano] [--repeticiones 3]
+import os
+import io
+import gc
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import contextlib
+import numpy as np
+import pandas as pd
+import shapely
+import geopandas as gpd
+import Cache_GNSS
+import Datos_sinteticos
+from Datos_sinteticos import TAMANOS, SRC_CAPAS
+from Puntos_GNSS import leer_gnss
+from Vuelos_produccion import (calcular_rumbos_y_grupos, segmentar_corridas, filtrar_segmentos, filas_de_segmentos,
+                               lineas_de_vuelo)
+from Lineas import concatenar_volumen, asignar_grupos, disolver_grupos, eliminar_no_unidas, ordenar_volumen, \
+    puntos_y_lineas_extremas
+from Volumen import puntos_extremos, anillo_vecino_mas_cercano
+
+VERSION_RESULTADOS = 1
+TOLERANCIA_REGRESION = 0.2  # Una etapa es regresión si tarda más de 20 % que en la referencia
+
+# Ejecutar 'funcion' varias veces (con la salida por consola suprimida) y devolver sus tiempos y el último resultado
+def medir(funcion, repeticiones):
+    tiempos = []
+    resultado = None
+    for _ in range(repeticiones):
+        gc.collect()
+        with contextlib.redirect_stdout(io.StringIO()):
+            inicio = time.perf_counter()
+            resultado = funcion()
+            tiempos.append(time.perf_counter() - inicio)
+    return tiempos, resultado
+
+def resumen(tiempos, elementos):
+    return {'mediana_s': float(np.median(tiempos)), 'minimo_s': float(np.min(tiempos)),
+            'repeticiones': len(tiempos), 'elementos': int(elementos)}
+
+# Agrupación de rumbos en 'Fil' (dos grupos más frecuentes) y segmentación 'fil2', como en lineas_de_vuelo
+def segmentar_fil2(grupos):
+    mas_frecuentes = pd.Series(grupos).value_counts().nlargest(2).index.to_numpy()
+    valores_fil = np.where(np.isin(grupos, mas_frecuentes), grupos, np.nan)
+    _, _, inicios, finales = filtrar_segmentos(*segmentar_corridas(~np.isnan(valores_fil)))
+    return filas_de_segmentos(inicios, finales, len(valores_fil))
+
+# Etapas de Vuelos_produccion sobre un registro GNSS sintético
+def etapas_vuelos(carpeta, parametros, repeticiones):
+    archivo = Datos_sinteticos.generar_gnss(os.path.join(carpeta, 'GNSS_v1.txt'), parametros['lineas_gnss'],
+                                            parametros['puntos_por_linea'])
+    resultados = {}
+
+    # Lectura del texto sin caché y desde la caché binaria ya construida
+    tamano_cache, carpeta_cache = Cache_GNSS.TAMANO_MAXIMO_MB, Cache_GNSS.CARPETA_CACHE
+    try:
+        Cache_GNSS.TAMANO_MAXIMO_MB = 0
+        tiempos, (x, y, z) = medir(lambda: leer_gnss(archivo, filas_a_eliminar=3, filtrar_z=True), repeticiones)
+        resultados['lectura_gnss_texto'] = resumen(tiempos, len(x))
+
+        Cache_GNSS.TAMANO_MAXIMO_MB, Cache_GNSS.CARPETA_CACHE = 2048, os.path.join(carpeta, 'cache_gnss')
+        leer_gnss(archivo, filas_a_eliminar=3)
+        tiempos, _ = medir(lambda: leer_gnss(archivo, filas_a_eliminar=3, filtrar_z=True), repeticiones)
+        resultados['lectura_gnss_cache'] = resumen(tiempos, len(x))
+
+        x, y = np.round(x, 9), np.round(y, 6)
+        tiempos, (_, grupos) = medir(lambda: calcular_rumbos_y_grupos(x, y), repeticiones)
+        resultados['rumbos_y_grupos'] = resumen(tiempos, len(x))
+
+        tiempos, _ = medir(lambda: segmentar_fil2(grupos), repeticiones)
+        resultados['segmentacion_fil2'] = resumen(tiempos, len(x))
+
+        tiempos, (_, gdf_lineas) = medir(lambda: lineas_de_vuelo(archivo, SRC_CAPAS, 2, 3, 4, 3), repeticiones)
+        resultados['lineas_de_vuelo'] = resumen(tiempos, len(x))
+        if len(gdf_lineas) != parametros['lineas_gnss']:
+            raise RuntimeError(f"Se esperaban {parametros['lineas_gnss']} líneas de vuelo y se obtuvieron {len(gdf_lineas)}")
+    finally:
+        Cache_GNSS.TAMANO_MAXIMO_MB, Cache_GNSS.CARPETA_CACHE = tamano_cache, carpeta_cache
+    return resultados
+
+# Etapas de Lineas y Volumen sobre las capas de vuelo sintéticas (en memoria)
+def etapas_lineas_y_volumen(parametros, repeticiones):
+    capas = Datos_sinteticos.lineas_de_vuelo_sinteticas(parametros['lineas_volumen'], parametros['vuelos'])
+    volumen = concatenar_volumen(capas)
+    volumen['long_km'] = volumen.geometry.length / 1000
+    resultados = {}
+
+    tiempos, volumen = medir(lambda: asignar_grupos(volumen.copy()), repeticiones)
+    resultados['agrupacion_grupo2'] = resumen(tiempos, len(volumen))
+
+    tiempos, disueltos = medir(lambda: disolver_grupos(volumen), repeticiones)
+    resultados['disolucion'] = resumen(tiempos, len(volumen))
+
+    def extremos():
+        volumen_final = ordenar_volumen(eliminar_no_unidas(volumen, lambda direccion: True), disueltos)
+        _, lineas_gdf = puntos_y_lineas_extremas(volumen_final)
+        return lineas_gdf
+    tiempos, lineas_gdf = medir(extremos, repeticiones)
+    resultados['extremos'] = resumen(tiempos, len(lineas_gdf))
+
+    tiempos, puntos = medir(lambda: puntos_extremos(lineas_gdf), repeticiones)
+    resultados['puntos_extremos_volumen'] = resumen(tiempos, len(puntos))
+
+    coordenadas = shapely.get_coordinates(puntos.geometry.values)
+    es_max = (puntos['type'] == 'Max').to_numpy()
+    tiempos, _ = medir(lambda: anillo_vecino_mas_cercano(coordenadas[es_max], coordenadas[~es_max]), repeticiones)
+    resultados['orden_poligono'] = resumen(tiempos, len(coordenadas))
+
+    tiempos, _ = medir(lambda: shapely.concave_hull(shapely.multipoints(coordenadas), ratio=0.3), repeticiones)
+    resultados['poligono_concavo'] = resumen(tiempos, len(coordenadas))
+    return resultados
+
+# Detener la prueba si dos estadísticas de CorteLAS no suman lo mismo
+def verificar_estadisticas(obtenidas, esperadas):
+    diferentes = []
+    if not np.array_equal(obtenidas['malla'], esperadas['malla']):
+        diferentes.append('malla')
+    for nombre, esperado in esperadas['poligonos'].items():
+        obtenido = obtenidas['poligonos'][nombre]
+        for campo in ('puntos', 'z_min', 'z_max'):
+            if obtenido[campo] != esperado[campo]:
+                diferentes.append(f"{nombre}.{campo}")
+        if not np.isclose(obtenido['z_suma'], esperado['z_suma']):
+            diferentes.append(f"{nombre}.z_suma")
+        if not np.array_equal(obtenido['clases'], esperado['clases']):
+            diferentes.append(f"{nombre}.clases")
+    if diferentes:
+        raise ValueError(f"Las estadísticas del recorte en paralelo no coinciden con las del pipeline único: {', '.join(diferentes)}")
+
+# Recorte de una nube LAS sintética con CorteLAS (requiere PDAL; sin él la etapa se omite)
+def etapas_corte(carpeta, parametros, repeticiones):
+    try:
+        import CorteLAS
+    except ImportError as error:
+        return {'recorte_las': {'omitido': f"No se pudo importar CorteLAS: {error}"}}
+
+    limites = Datos_sinteticos.limites_lineas(parametros['lineas_volumen'])
+    las = Datos_sinteticos.generar_las(os.path.join(carpeta, 'Nube.las'), parametros['puntos_las'], limites)
+    poligono = Datos_sinteticos.poligono_recorte(limites)
+    salida = os.path.join(carpeta, 'Nube_recortado.las')
+
+    tiempos, _ = medir(lambda: CorteLAS.ejecutar_pipeline(CorteLAS.pipeline_recorte(las, poligono.wkt, salida)), repeticiones)
+    resultados = {'recorte_las': resumen(tiempos, parametros['puntos_las'])}
+
+    # El recorte en paralelo debe dar las mismas estadísticas que el pipeline único
+    unico = CorteLAS.nuevas_estadisticas({'recorte': poligono}, 10.0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        CorteLAS.ejecutar_pipeline(CorteLAS.pipeline_recorte(las, poligono.wkt, salida), estadisticas=unico)
+    paralelo = {}
+    def recorte_en_paralelo():
+        paralelo['estadisticas'] = CorteLAS.nuevas_estadisticas({'recorte': poligono}, 10.0)
+        return CorteLAS.recortar_en_paralelo(las, poligono.wkt, salida, 2, estadisticas=paralelo['estadisticas'])
+    tiempos, _ = medir(recorte_en_paralelo, repeticiones)
+    verificar_estadisticas(paralelo['estadisticas'], unico)
+    resultados['recorte_en_paralelo'] = resumen(tiempos, parametros['puntos_las'])
+
+    cuadrantes = {f"c{i}": poligono.intersection(shapely.box(*caja)) for i, caja in enumerate([
+        (limites[0], limites[1], (limites[0] + limites[2]) / 2, (limites[1] + limites[3]) / 2),
+        ((limites[0] + limites[2]) / 2, (limites[1] + limites[3]) / 2, limites[2], limites[3])])}
+    base = os.path.join(carpeta, 'Nube')
+    tiempos, _ = medir(lambda: CorteLAS.recortar_por_poligono(las, cuadrantes, base), repeticiones)
+    resultados['recorte_por_poligono'] = resumen(tiempos, parametros['puntos_las'])
+    return resultados
+
+def entorno():
+    import pyproj
+    return {'python': platform.python_version(), 'plataforma': platform.platform(), 'procesador': platform.processor(),
+            'nucleos': os.cpu_count(), 'numpy': np.__version__, 'pandas': pd.__version__, 'shapely': shapely.__version__,
+            'geopandas': gpd.__version__, 'pyproj': pyproj.__version__}
+
+def ejecutar_benchmark(tamanos, repeticiones):
+    resultados = {}
+    for tamano in tamanos:
+        parametros = TAMANOS[tamano]
+        print(f"Tamaño '{tamano}': {parametros}")
+        with tempfile.TemporaryDirectory(prefix='benchmark_') as carpeta:
+            etapas = {}
+            etapas.update(etapas_vuelos(carpeta, parametros, repeticiones))
+            etapas.update(etapas_lineas_y_volumen(parametros, repeticiones))
+            etapas.update(etapas_corte(carpeta, parametros, repeticiones))
+        for etapa, medicion in etapas.items():
+            if 'omitido' in medicion:
+                print(f"  {etapa}: omitido ({medicion['omitido']})")
+            else:
+                print(f"  {etapa}: {medicion['mediana_s'] * 1000:.1f} ms ({medicion['elementos']} elementos)")
+        resultados[tamano] = etapas
+
+    return {'version': VERSION_RESULTADOS, 'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'), 'entorno': entorno(),
+            'repeticiones': repeticiones, 'tamanos': {t: TAMANOS[t] for t in tamanos}, 'resultados': resultados}
+
+# Comparar con una ejecución anterior por la mediana; devuelve las etapas que empeoraron más de la tolerancia
+def comparar(actual, referencia, tolerancia=TOLERANCIA_REGRESION):
+    regresiones = []
+    print("\nComparación con la referencia (actual / referencia):")
+    for tamano, etapas in actual['resultados'].items():
+        for etapa, medicion in etapas.items():
+            anterior = referencia.get('resultados', {}).get(tamano, {}).get(etapa)
+            if not anterior or 'omitido' in medicion or 'omitido' in anterior:
+                continue
+            razon = medicion['mediana_s'] / anterior['mediana_s'] if anterior['mediana_s'] else float('inf')
+            marca = '  REGRESIÓN' if razon > 1 + tolerancia else ''
+            print(f"  {tamano}/{etapa}: {anterior['mediana_s'] * 1000:.1f} ms -> {medicion['mediana_s'] * 1000:.1f} ms ({razon:.2f}x){marca}")
+            if marca:
+                regresiones.append(f"{tamano}/{etapa}")
+    return regresiones
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Pruebas de rendimiento por etapa con datos sintéticos.")
+    parser.add_argument('salida', help="Archivo JSON donde se guardan los resultados")
+    parser.add_argument('--referencia', help="JSON de una ejecución anterior para comparar")
+    parser.add_argument('--tamanos', default='pequeno,mediano', help=f"Tamaños separados por coma ({', '.join(TAMANOS)})")
+    parser.add_argument('--repeticiones', type=int, default=3)
+    argumentos = parser.parse_args()
+
+    tamanos = [t.strip() for t in argumentos.tamanos.split(',') if t.strip()]
+    desconocidos = [t for t in tamanos if t not in TAMANOS]
+    if desconocidos:
+        parser.error(f"Tamaños desconocidos: {', '.join(desconocidos)}")
+
+    actual = ejecutar_benchmark(tamanos, argumentos.repeticiones)
+    with open(argumentos.salida, 'w', encoding='utf-8') as f:
+        json.dump(actual, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados guardados en {argumentos.salida}")
+
+    if argumentos.referencia:
+        with open(argumentos.referencia, 'r', encoding='utf-8') as f:
+            regresiones = comparar(actual, json.load(f))
+        if regresiones:
+            print(f"\n{len(regresiones)} etapas más lentas que la referencia: {', '.join(regresiones)}")
+            sys.exit(1)
@@ -0,0 +1,146 @@
+#Caché binaria de archivos GNSS .txt compartida por Rutas, RutasMaster, Vuelos_produccion y Geoetiquetado
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Carpeta y tamaño máximo de la caché. Está desactivada por defecto; se activa con GNSS_CACHE_MB=<MB>
+# (p. ej. 2048) y conviene fijar GNSS_CACHE_DIR para no crear 'cache_gnss' en cada carpeta de trabajo.
+CARPETA_CACHE = os.environ.get('GNSS_CACHE_DIR', os.path.join(os.getcwd(), 'cache_gnss'))
+TAMANO_MAXIMO_MB = float(os.environ.get('GNSS_CACHE_MB', 0))
+
+# Inicio de la ejecución, heredado por los procesos del pool: las entradas usadas desde entonces no se
+# eliminan, porque otro proceso de la misma ejecución puede estar por abrirlas
+VARIABLE_INICIO = 'GNSS_CACHE_INICIO'
+os.environ.setdefault(VARIABLE_INICIO, repr(time.time()))
+
+# Opciones de lectura que forman parte de la clave; cambiarlas invalida las entradas existentes
+OPCIONES_LECTURA = {'sep': r'\s+', 'header': None, 'dtype': 'float64', 'version': 1}
+FILAS_POR_BLOQUE = 1_000_000
+
+def cache_activa():
+    return TAMANO_MAXIMO_MB > 0
+
+# Clave de un archivo: ruta absoluta, tamaño, fecha de modificación y opciones de lectura
+def clave_archivo(archivo):
+    info = os.stat(archivo)
+    datos = json.dumps([os.path.abspath(archivo), info.st_size, info.st_mtime_ns, OPCIONES_LECTURA], sort_keys=True)
+    return hashlib.sha1(datos.encode('utf-8')).hexdigest()
+
+# Analizar el texto por bloques y guardar cada columna numérica como binario float64 independiente.
+# Las columnas no numéricas (fechas, horas, etiquetas) no se guardan.
+def construir_entrada(archivo, carpeta_entrada):
+    os.makedirs(CARPETA_CACHE, exist_ok=True)
+    carpeta_temporal = tempfile.mkdtemp(dir=CARPETA_CACHE, prefix='.construyendo_')
+    try:
+        salidas = {}
+        no_numericas = set()
+        n_filas = 0
+        n_columnas = 0
+        with pd.read_csv(archivo, sep=OPCIONES_LECTURA['sep'], header=None, chunksize=FILAS_POR_BLOQUE) as lector:
+            for bloque in lector:
+                n_columnas = max(n_columnas, bloque.shape[1])
+                for columna in bloque.columns:
+                    if columna in no_numericas:
+                        continue
+                    if not pd.api.types.is_numeric_dtype(bloque[columna]):
+                        no_numericas.add(columna)
+                        continue
+                    if columna not in salidas:
+                        if n_filas:  # Columna que aparece después del primer bloque
+                            no_numericas.add(columna)
+                            continue
+                        salidas[columna] = open(os.path.join(carpeta_temporal, f'c{columna}.bin'), 'wb')
+                    bloque[columna].to_numpy(dtype=np.float64).tofile(salidas[columna])
+                n_filas += len(bloque)
+
+        for salida in salidas.values():
+            salida.close()
+        for columna in no_numericas & set(salidas):
+            os.remove(os.path.join(carpeta_temporal, f'c{columna}.bin'))
+
+        meta = {'archivo': os.path.abspath(archivo), 'filas': n_filas, 'columnas': n_columnas,
+                'numericas': sorted(int(c) for c in set(salidas) - no_numericas), 'opciones': OPCIONES_LECTURA}
+        with open(os.path.join(carpeta_temporal, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+        # Publicar la entrada de forma atómica; si otro proceso la creó antes se conserva la suya
+        try:
+            os.rename(carpeta_temporal, carpeta_entrada)
+        except OSError:
+            shutil.rmtree(carpeta_temporal, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(carpeta_temporal, ignore_errors=True)
+        raise
+
+def tamano_entrada(carpeta_entrada):
+    return sum(e.stat().st_size for e in os.scandir(carpeta_entrada) if e.is_file())
+
+# Eliminar las entradas usadas hace más tiempo hasta quedar por debajo del tamaño máximo.
+# Las usadas durante la ejecución actual se conservan aunque la caché quede temporalmente por encima.
+def depurar_cache(conservar=None):
+    inicio = float(os.environ[VARIABLE_INICIO])
+    if not os.path.isdir(CARPETA_CACHE):
+        return
+    entradas = []
+    for entrada in os.scandir(CARPETA_CACHE):
+        ruta_meta = os.path.join(entrada.path, 'meta.json')
+        if entrada.is_dir() and not entrada.name.startswith('.') and os.path.exists(ruta_meta):
+            entradas.append((os.path.getmtime(ruta_meta), tamano_entrada(entrada.path), entrada.path))
+
+    total = sum(tamano for _, tamano, _ in entradas)
+    limite = TAMANO_MAXIMO_MB * 1e6
+    for ultimo_uso, tamano, ruta in sorted(entradas):
+        if total <= limite:
+            break
+        if ruta == conservar or ultimo_uso >= inicio:
+            continue
+        shutil.rmtree(ruta, ignore_errors=True)
+        total -= tamano
+
+# Columnas de la entrada en caché como memmap de solo lectura (sin copia).
+# Devuelve (meta, {columna: arreglo}) o None si alguna columna pedida no es numérica o si la entrada
+# desapareció mientras se abría (otra ejecución la eliminó); en ambos casos quien llama analiza el texto.
+def cargar_entrada(archivo, columnas):
+    carpeta_entrada = os.path.join(CARPETA_CACHE, clave_archivo(archivo))
+    ruta_meta = os.path.join(carpeta_entrada, 'meta.json')
+    if not os.path.exists(ruta_meta):
+        construir_entrada(archivo, carpeta_entrada)
+        depurar_cache(conservar=carpeta_entrada)
+
+    try:
+        with open(ruta_meta, 'r') as f:
+            meta = json.load(f)
+        os.utime(ruta_meta, (time.time(), time.time()))  # Marca de último uso para el LRU
+
+        if any(c not in meta['numericas'] for c in columnas):
+            return None
+        arreglos = {}
+        for c in columnas:
+            ruta = os.path.join(carpeta_entrada, f'c{c}.bin')
+            arreglos[c] = np.memmap(ruta, dtype=np.float64, mode='r') if meta['filas'] else np.empty(0)
+        return meta, arreglos
+    except FileNotFoundError:
+        return None
+
+# Leer columnas de un archivo GNSS omitiendo las filas iniciales.
+# Devuelve ([arreglos en el orden pedido], número de columnas del archivo); sin caché se analiza el texto.
+# Si falta alguna columna pedida la lista está vacía y no se convierte nada, para que quien llama
+# reporte el archivo por su número de columnas aunque tenga texto.
+def leer_columnas(archivo, columnas, filas_a_eliminar=0):
+    if cache_activa():
+        resultado = cargar_entrada(archivo, columnas)
+        if resultado is not None:
+            meta, arreglos = resultado
+            return [arreglos[c][filas_a_eliminar:] for c in columnas], meta['columnas']
+
+    df = pd.read_csv(archivo, sep=OPCIONES_LECTURA['sep'], header=None)
+    if filas_a_eliminar > 0:
+        df = df.iloc[filas_a_eliminar:]
+    if any(c not in df.columns for c in columnas):
+        return [], df.shape[1]
+    return [df[c].to_numpy(dtype=float) for c in columnas], df.shape[1]
@@ -1,30 +1,69 @@
 import glob
+import os
+import time
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from Instrumentacion import etapa
 
-def renombrar_columna(archivo_entrada, archivo_salida):
-    with open(archivo_entrada, 'r') as entrada:
-        lineas = entrada.readlines()
+LINEAS_CABECERA = 6
 
-    # Eliminar las primeras 6 líneas
-    lineas = lineas[6:]
+# Numerar las líneas de eventos de un archivo de cámara abierto: se omiten las 6 líneas de cabecera y
+# cada línea restante, incluidas las cortas o vacías, recibe el siguiente número de foto (desde 1).
+# Es la numeración DSC que comparten Camaras y Geoetiquetado.
+def numerar_eventos(entrada):
+    return enumerate(islice(entrada, LINEAS_CABECERA, None), start=1)
 
-    # Renombrar la primera columna
-    for i in range(len(lineas)):
-        if len(lineas[i]) >= 8:  # Asegúrate de que la línea tenga al menos 8 caracteres
-            nuevo_nombre = 'DSC{0}.JPG{1}'.format(str(i+1).zfill(5), lineas[i][8:])
-            lineas[i] = nuevo_nombre  # Modificación aquí
-        else:
-            print(f"Advertencia: La línea {i+1} tiene menos de 8 caracteres y no se modificará.")
+def nombre_foto(numero):
+    return 'DSC{0}.JPG'.format(str(numero).zfill(5))
 
-    # Escribir en el archivo de salida
-    with open(archivo_salida, 'w') as salida:
-        salida.writelines(lineas)
+# Reescribir un archivo de eventos de cámara línea por línea con un buffer acotado.
+# Devuelve el número de líneas escritas, las líneas que no se modificaron y el tiempo empleado.
+def renombrar_columna(archivo_entrada, archivo_salida, tamano_buffer=10000):
+    inicio = time.time()
+    advertencias = []
+    buffer = []
+    lineas = 0
 
-# Obtener una lista de todos los archivos que comienzan con "Camara_v"
-archivos_entrada = glob.glob('Camara_v*.txt')
+    with open(archivo_entrada, 'r') as entrada, open(archivo_salida, 'w') as salida:
+        # Eliminar las primeras 6 líneas y renombrar la primera columna
+        for i, linea in numerar_eventos(entrada):
+            if len(linea) >= 8:  # Asegúrate de que la línea tenga al menos 8 caracteres
+                linea = nombre_foto(i) + linea[8:]
+            else:
+                advertencias.append(i)
+            buffer.append(linea)
+            lineas = i
 
-# Procesar cada archivo
-for archivo_entrada in archivos_entrada:
+            # Escribir en el archivo de salida por bloques
+            if len(buffer) >= tamano_buffer:
+                salida.writelines(buffer)
+                buffer.clear()
+
+        salida.writelines(buffer)
+
+    return lineas, advertencias, time.time() - inicio
+
+def procesar_archivo(archivo_entrada):
     archivo_salida = archivo_entrada.replace('.txt', '__.txt')  # Nombre de archivo de salida
-    renombrar_columna(archivo_entrada, archivo_salida)
+    with etapa('camara', archivo_entrada) as medicion:
+        lineas, advertencias, segundos = renombrar_columna(archivo_entrada, archivo_salida)
+        medicion.contar(lineas=lineas, advertencias=len(advertencias))
+    return archivo_salida, lineas, advertencias, segundos
+
+if __name__ == '__main__':
+    # Obtener una lista de todos los archivos que comienzan con "Camara_v"
+    archivos_entrada = glob.glob('Camara_v*.txt')
+
+    procesos = input(f"Número de procesos en paralelo (vacío para usar los {os.cpu_count()} núcleos): ").strip()
+    procesos = int(procesos) if procesos else os.cpu_count()
+
+    # Procesar los archivos en paralelo; los resultados se reportan en el orden de los archivos
+    with etapa('Camaras') as medicion_total, ProcessPoolExecutor(max_workers=max(1, procesos)) as executor:
+        for archivo_entrada, (archivo_salida, lineas, advertencias, segundos) in zip(archivos_entrada, executor.map(procesar_archivo, archivos_entrada)):
+            for i in advertencias:
+                print(f"Advertencia: La línea {i} tiene menos de 8 caracteres y no se modificará.")
 
-    print(f"Archivo: {archivo_entrada} modificado a: {archivo_salida} ")
\ No newline at end of file
+            print(f"Archivo: {archivo_entrada} modificado a: {archivo_salida} ")
+            tamano_mb = os.path.getsize(archivo_entrada) / 1e6
+            print(f"  {lineas} líneas en {segundos:.2f} s ({lineas / max(segundos, 1e-9):.0f} líneas/s, {tamano_mb / max(segundos, 1e-9):.1f} MB/s)")
+            medicion_total.contar(archivos=1, lineas=lineas)
@@ -4,8 +4,20 @@ import geopandas as gpd
 from shapely.geometry import Point
 from tqdm import tqdm
 import time
+import json
+import math
+import glob
+import shutil
+import re
 import numpy as np
 import pdal
+import pandas as pd
+import pyproj
+import shapely
+from shapely.geometry import box
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from Proyecciones import reproyectar_gdf
+from Instrumentacion import etapa, etapa_actual, instrumentado
 
 # Configurar el autocompletado con TAB
 def completer(text, state):
@@ -17,74 +29,590 @@ def completer(text, state):
 readline.set_completer(completer)
 readline.parse_and_bind('tab: complete')  # Habilitar autocompletado con TAB
 
-# Introduce nombre de archivo LAS
-filename_las = input("Nombre de archivo LAS (sin extensión .las): ")
-las_file_path = f"{filename_las}.las"
+# Lector PDAL según el formato de entrada. Un COPC (.copc.laz) se lee solo en los nodos del
+# octree que tocan 'limites' (minx, miny, maxx, maxy); un LAS admite leer un rango de puntos.
+def lector_las(entrada, limites=None, inicio=None, cantidad=None):
+    if entrada.endswith('.copc.laz'):
+        lector = {"type": "readers.copc", "filename": entrada}
+        if limites is not None:
+            minx, miny, maxx, maxy = limites
+            lector["bounds"] = f"([{minx}, {maxx}], [{miny}, {maxy}])"
+        return lector
 
-if os.path.exists(las_file_path):
-    print(f"Archivo capturado: {las_file_path} \n")
+    lector = {"type": "readers.las", "filename": entrada}
+    if inicio is not None:
+        lector["start"] = inicio
+        lector["count"] = cantidad
+    return lector
 
-    # Leer el archivo LAS usando PDAL
-    filename_SHP = input("Nombre de archivo SHAPE (sin extensión .shp): ")
-    shp_file_path = f"{filename_SHP}.shp"
+# Pipeline PDAL de recorte: lectura (opcionalmente solo un rango de puntos o una zona del COPC),
+# recorte exacto con el polígono y escritura del resultado
+def pipeline_recorte(las_file_path, polygon_wkt, salida, inicio=None, cantidad=None, limites=None):
+    return json.dumps({
+        "pipeline": [
+            lector_las(las_file_path, limites, inicio, cantidad),
+            {
+                "type": "filters.crop",
+                "polygon": polygon_wkt
+            },
+            {
+                "type": "writers.las",
+                "filename": salida
+            }
+        ]
+    })
 
-    if os.path.exists(shp_file_path):
-        print(f"Archivo capturado: {shp_file_path}\n")
-        # Cargar el archivo SHP como GeoDataFrame
-        shp_file = gpd.read_file(shp_file_path)
+# Número de puntos del LAS leyendo solo la cabecera
+def numero_de_puntos(las_file_path):
+    info = pdal.Pipeline(json.dumps([las_file_path])).quickinfo
+    return next(iter(info.values()))['num_points']
+
+# Índice COPC (octree) del LAS para recortes repetidos; se crea una sola vez y se reutiliza
+# mientras el LAS no sea más reciente que el índice
+@instrumentado('indice_copc', archivo='las_file_path')
+def indexar_copc(las_file_path):
+    copc_path = os.path.splitext(las_file_path)[0] + '.copc.laz'
+    if os.path.exists(copc_path) and os.path.getmtime(copc_path) >= os.path.getmtime(las_file_path):
+        print(f"Usando índice COPC existente '{copc_path}'\n")
+        return copc_path
+
+    print(f"Creando índice COPC '{copc_path}' (solo la primera vez)...")
+    pdal.Pipeline(json.dumps([las_file_path, {"type": "writers.copc", "filename": copc_path, "forward": "all"}])).execute()
+    return copc_path
+
+# Estadísticas de control de calidad que se acumulan durante el recorte: malla de densidad con
+# celdas de 'tamano_celda' sobre la extensión de los polígonos y, por polígono, conteo, densidad,
+# Z mínima/máxima/media e histograma de clasificación
+def nuevas_estadisticas(poligonos, tamano_celda):
+    minx, miny, maxx, maxy = shapely.total_bounds(np.array(list(poligonos.values())))
+    filas = max(1, math.ceil((maxy - miny) / tamano_celda))
+    columnas = max(1, math.ceil((maxx - minx) / tamano_celda))
+    return {
+        'tamano_celda': tamano_celda,
+        'origen': (minx, maxy),
+        'malla': np.zeros((filas, columnas), dtype=np.int64),
+        'poligonos': {nombre: estadisticas_poligono(geometria.area) for nombre, geometria in poligonos.items()}
+    }
+
+def estadisticas_poligono(area):
+    return {'area': area, 'puntos': 0, 'z_min': np.inf, 'z_max': -np.inf, 'z_suma': 0.0,
+            'clases': np.zeros(256, dtype=np.int64)}
+
+# Estadísticas en cero con la misma malla y polígonos, para acumular un bloque por separado
+def estadisticas_vacias(estadisticas):
+    return {
+        'tamano_celda': estadisticas['tamano_celda'],
+        'origen': estadisticas['origen'],
+        'malla': np.zeros_like(estadisticas['malla']),
+        'poligonos': {nombre: estadisticas_poligono(poligono['area']) for nombre, poligono in estadisticas['poligonos'].items()}
+    }
+
+# Sumar los puntos de 'arreglo' a las estadísticas del polígono 'nombre' y, con 'malla', a la malla de densidad
+def acumular_estadisticas(estadisticas, nombre, arreglo, malla=True):
+    if len(arreglo) == 0:
+        return
+
+    poligono = estadisticas['poligonos'][nombre]
+    z = arreglo['Z']
+    poligono['puntos'] += len(z)
+    poligono['z_min'] = min(poligono['z_min'], float(z.min()))
+    poligono['z_max'] = max(poligono['z_max'], float(z.max()))
+    poligono['z_suma'] += float(z.sum())
+    if 'Classification' in arreglo.dtype.names:
+        poligono['clases'] += np.bincount(arreglo['Classification'], minlength=256)[:256]
+    if malla:
+        acumular_malla(estadisticas, arreglo)
+
+# Sumar los puntos de 'arreglo' a la malla de densidad
+def acumular_malla(estadisticas, arreglo):
+    if len(arreglo) == 0:
+        return
+
+    malla = estadisticas['malla']
+    filas, columnas = malla.shape
+    origen_x, origen_y = estadisticas['origen']
+    columna = np.clip(((arreglo['X'] - origen_x) // estadisticas['tamano_celda']).astype(np.int64), 0, columnas - 1)
+    fila = np.clip(((origen_y - arreglo['Y']) // estadisticas['tamano_celda']).astype(np.int64), 0, filas - 1)
+    malla += np.bincount(fila * columnas + columna, minlength=filas * columnas).reshape(filas, columnas)
+
+# Sumar las estadísticas parciales de otro proceso
+def combinar_estadisticas(estadisticas, parcial):
+    estadisticas['malla'] += parcial['malla']
+    for nombre, poligono in parcial['poligonos'].items():
+        total = estadisticas['poligonos'][nombre]
+        total['puntos'] += poligono['puntos']
+        total['z_min'] = min(total['z_min'], poligono['z_min'])
+        total['z_max'] = max(total['z_max'], poligono['z_max'])
+        total['z_suma'] += poligono['z_suma']
+        total['clases'] += poligono['clases']
+
+# Guardar el resumen por polígono en JSON y CSV y la malla de densidad (puntos/m²) como NumPy
+@instrumentado('estadisticas')
+def guardar_estadisticas(estadisticas, base_salida, SRC_asignado=None):
+    resumen = []
+    for nombre, poligono in estadisticas['poligonos'].items():
+        puntos = poligono['puntos']
+        resumen.append({
+            'poligono': nombre,
+            'puntos': puntos,
+            'area_m2': poligono['area'],
+            'densidad_pts_m2': puntos / poligono['area'] if poligono['area'] else None,
+            'z_min': poligono['z_min'] if puntos else None,
+            'z_max': poligono['z_max'] if puntos else None,
+            'z_media': poligono['z_suma'] / puntos if puntos else None,
+            'clases': {int(c): int(n) for c, n in enumerate(poligono['clases']) if n}
+        })
+
+    celda = estadisticas['tamano_celda']
+    ruta_malla = f"{base_salida}_densidad.npy"
+    np.save(ruta_malla, (estadisticas['malla'] / (celda * celda)).astype(np.float32))
+
+    filas, columnas = estadisticas['malla'].shape
+    with open(f"{base_salida}_estadisticas.json", 'w') as f:
+        json.dump({
+            'malla_densidad': {
+                'archivo': os.path.basename(ruta_malla), 'src': SRC_asignado, 'tamano_celda': celda,
+                'origen_x': float(estadisticas['origen'][0]), 'origen_y': float(estadisticas['origen'][1]),
+                'filas': filas, 'columnas': columnas, 'unidades': 'puntos/m²'
+            },
+            'poligonos': resumen
+        }, f, indent=2, ensure_ascii=False)
+
+    tabla = pd.DataFrame(resumen)
+    tabla['clases'] = tabla['clases'].apply(lambda clases: ' '.join(f"{c}:{n}" for c, n in clases.items()))
+    tabla.to_csv(f"{base_salida}_estadisticas.csv", index=False)
+    print(f"Estadísticas guardadas en '{base_salida}_estadisticas.json/.csv' y malla de densidad en '{ruta_malla}'")
+
+# Ejecutar un pipeline PDAL en memoria o, si tamano_stream > 0, en modo streaming con bloques
+# de tamano_stream puntos, de modo que la memoria no dependa del tamaño del archivo.
+# Con total_puntos se reportan los puntos leídos y conservados en cada bloque; con 'estadisticas'
+# los puntos conservados se acumulan en ellas bajo 'nombre' en la misma pasada.
+@instrumentado('pipeline_pdal')
+def ejecutar_pipeline(pipeline, tamano_stream=0, total_puntos=None, estadisticas=None, nombre='recorte'):
+    pipeline_obj = pdal.Pipeline(pipeline)
+    if tamano_stream > 0 and not pipeline_obj.streamable:
+        print("Alguna etapa del pipeline no admite modo streaming; se ejecutará en memoria.")
+        tamano_stream = 0
+
+    if tamano_stream <= 0:
+        conservados = pipeline_obj.execute()
+        if estadisticas is not None:
+            for arreglo in pipeline_obj.arrays:
+                acumular_estadisticas(estadisticas, nombre, arreglo)
+        etapa_actual().contar(conservados=conservados)
+        return conservados
+
+    if total_puntos is None and estadisticas is None:
+        conservados = pipeline_obj.execute_streaming(chunk_size=tamano_stream)
+        etapa_actual().contar(conservados=conservados)
+        return conservados
+
+    conservados = 0
+    with tqdm(total=total_puntos, desc="Procesando con PDAL (streaming)", unit=" pts", disable=total_puntos is None) as barra:
+        for numero, arreglo in enumerate(pipeline_obj.iterator(chunk_size=tamano_stream), start=1):
+            conservados += len(arreglo)
+            if estadisticas is not None:
+                acumular_estadisticas(estadisticas, nombre, arreglo)
+            if total_puntos is not None:
+                leidos = min(tamano_stream, total_puntos - barra.n)
+                barra.update(leidos)
+                barra.set_postfix(bloque=numero, leidos=leidos, conservados_bloque=len(arreglo), conservados=conservados)
+    etapa_actual().contar(conservados=conservados)
+    return conservados
+
+# Recortar un rango de puntos del LAS; se ejecuta en un proceso del pool y devuelve
+# los puntos conservados y sus estadísticas parciales
+@instrumentado('recorte_bloque', archivo='las_file_path')
+def recortar_bloque(las_file_path, polygon_wkt, salida, inicio, cantidad, tamano_stream=0, estadisticas=None):
+    conservados = ejecutar_pipeline(pipeline_recorte(las_file_path, polygon_wkt, salida, inicio, cantidad), tamano_stream,
+                                    estadisticas=estadisticas)
+    return conservados, estadisticas
+
+# Unir los bloques recortados en un solo LAS conservando el orden de los puntos. Los lectores se
+# encadenan en modo streaming de 'tamano_stream' puntos hacia un solo escritor, así que la memoria no
+# depende del tamaño de la nube recortada. Si la versión de PDAL no admite el pipeline en streaming,
+# ejecutar_pipeline lo avisa y la unión se hace en memoria (toda la nube recortada a la vez); en ese
+# caso conviene conservar los bloques por separado.
+def unir_bloques(partes, salida, tamano_stream=1_000_000):
+    pipeline = json.dumps({
+        "pipeline": partes + [
+            {
+                "type": "writers.las",
+                "filename": salida
+            }
+        ]
+    })
+    return ejecutar_pipeline(pipeline, tamano_stream)
+
+# Recorte en paralelo: el archivo se divide en rangos contiguos de puntos y cada proceso lee
+# y recorta solo su rango con el polígono completo. Un LAS sin índice espacial tendría que leerse
+# entero por cada mosaico del polígono; con rangos cada punto se lee una sola vez y, al unir
+# los bloques en orden, el resultado es idéntico al del pipeline único.
+@instrumentado('recorte_en_paralelo', archivo='las_file_path')
+def recortar_en_paralelo(las_file_path, polygon_wkt, salida, procesos, conservar_bloques=False, tamano_stream=0, estadisticas=None):
+    total_puntos = numero_de_puntos(las_file_path)
+    etapa_actual().contar(puntos=total_puntos)
+    tamano_bloque = max(1, math.ceil(total_puntos / (procesos * 4)))  # Varios bloques por proceso para un avance fluido
+    base_salida = os.path.splitext(salida)[0]
+
+    bloques = []
+    for numero, inicio in enumerate(range(0, total_puntos, tamano_bloque)):
+        parte = f"{base_salida}_bloque{numero:04d}.las"
+        bloques.append((parte, inicio, min(tamano_bloque, total_puntos - inicio)))
+
+    # Cada bloque acumula desde cero; solo el proceso principal suma los resultados en 'estadisticas'.
+    # La plantilla no se modifica aquí, así que cada envío al pool se serializa siempre en cero.
+    plantilla = estadisticas_vacias(estadisticas) if estadisticas is not None else None
+
+    puntos_conservados = 0
+    with ProcessPoolExecutor(max_workers=procesos) as executor:
+        futuros = [executor.submit(recortar_bloque, las_file_path, polygon_wkt, parte, inicio, cantidad, tamano_stream, plantilla)
+                   for parte, inicio, cantidad in bloques]
+        for futuro in tqdm(as_completed(futuros), total=len(futuros), desc="Recortando bloques"):
+            conservados, parcial = futuro.result()
+            puntos_conservados += conservados
+            etapa_actual().contar(conservados=conservados, bloques=1)
+            if estadisticas is not None:
+                combinar_estadisticas(estadisticas, parcial)
+
+    partes = [parte for parte, _, _ in bloques]
+    if conservar_bloques:
+        print(f"{len(partes)} bloques guardados como '{base_salida}_bloqueXXXX.las'")
+        return partes
+
+    unir_bloques(partes, salida, tamano_stream or 1_000_000)
+    for parte in partes:
+        os.remove(parte)
+    print(f"{puntos_conservados} de {total_puntos} puntos conservados")
+    return [salida]
+
+# Escribir un arreglo de puntos de PDAL en un archivo LAS
+def escribir_puntos(arreglo, salida):
+    pipeline_obj = pdal.Pipeline(json.dumps([{"type": "writers.las", "filename": salida}]), arrays=[arreglo])
+    return pipeline_obj.execute()
+
+# Nombres de archivo para cada polígono a partir de una columna (o del índice si no se indica)
+def nombres_poligonos(shp_file, columna=None):
+    valores = shp_file[columna].astype(str) if columna else shp_file.index.astype(str)
+    nombres = {}
+    for valor, geometria in zip(valores, shp_file.geometry):
+        nombre = re.sub(r'[^\w\-]+', '_', valor).strip('_') or 'poligono'
+        while nombre in nombres:
+            nombre += '_'
+        nombres[nombre] = geometria
+    return nombres
+
+# Recorte de varios polígonos con una sola lectura de la nube: cada bloque de puntos se compara
+# solo con los polígonos cuya caja toca la del bloque (R-tree), luego con su caja y por último
+# con la geometría preparada. Los puntos de cada polígono se escriben por partes y se unen al final.
+@instrumentado('recorte_por_poligono', archivo='las_file_path')
+def recortar_por_poligono(las_file_path, poligonos, base_salida, tamano_bloque=1_000_000, estadisticas=None):
+    nombres = list(poligonos)
+    geometrias = np.array(list(poligonos.values()))
+    shapely.prepare(geometrias)
+    arbol = shapely.STRtree(geometrias)
+    cajas = shapely.bounds(geometrias)
+
+    partes = {nombre: [] for nombre in nombres}
+    pendientes = {nombre: [] for nombre in nombres}
+
+    def vaciar(nombre):
+        parte = f"{base_salida}_{nombre}_parte{len(partes[nombre]):05d}.las"
+        escribir_puntos(np.concatenate(pendientes[nombre]), parte)
+        partes[nombre].append(parte)
+        pendientes[nombre] = []
+
+    limites = (cajas[:, 0].min(), cajas[:, 1].min(), cajas[:, 2].max(), cajas[:, 3].max())
+    etapa_lectura = lector_las(las_file_path, limites)
+    lector = pdal.Pipeline(json.dumps([etapa_lectura]))
+    # Con índice COPC solo se leen los nodos dentro de los límites: el total del archivo no aplica
+    total_puntos = None if etapa_lectura['type'] == 'readers.copc' else numero_de_puntos(las_file_path)
+    with tqdm(total=total_puntos, desc="Recortando por polígono", unit=" pts") as barra:
+        for arreglo in lector.iterator(chunk_size=tamano_bloque):
+            x = arreglo['X']
+            y = arreglo['Y']
+            if len(x):
+                # Un punto dentro de varios polígonos superpuestos cuenta en cada polígono pero una sola vez en la malla
+                en_alguno = np.zeros(len(x), dtype=bool)
+                for i in arbol.query(box(x.min(), y.min(), x.max(), y.max())):
+                    minx, miny, maxx, maxy = cajas[i]
+                    en_caja = np.flatnonzero((x >= minx) & (x <= maxx) & (y >= miny) & (y <= maxy))
+                    dentro = en_caja[shapely.intersects_xy(geometrias[i], x[en_caja], y[en_caja])]
+                    if len(dentro):
+                        pendientes[nombres[i]].append(arreglo[dentro])
+                        etapa_actual().contar(conservados=len(dentro))
+                        if estadisticas is not None:
+                            acumular_estadisticas(estadisticas, nombres[i], pendientes[nombres[i]][-1], malla=False)
+                            en_alguno[dentro] = True
+                        if sum(len(p) for p in pendientes[nombres[i]]) >= tamano_bloque:
+                            vaciar(nombres[i])
+                if estadisticas is not None:
+                    acumular_malla(estadisticas, arreglo[en_alguno])
+            barra.update(len(arreglo))
+            etapa_actual().contar(puntos=len(arreglo))
+
+    salidas = []
+    for nombre in nombres:
+        if pendientes[nombre]:
+            vaciar(nombre)
+        if not partes[nombre]:
+            continue
+
+        salida = f"{base_salida}_{nombre}_recortado.las"
+        if len(partes[nombre]) == 1:
+            os.replace(partes[nombre][0], salida)
+        else:
+            unir_bloques(partes[nombre], salida, tamano_bloque)
+            for parte in partes[nombre]:
+                os.remove(parte)
+        salidas.append(salida)
+
+    print(f"{len(salidas)} de {len(nombres)} polígonos con puntos.")
+    return salidas
+
+# Leer de la cabecera de un LAS sus límites, número de puntos y SRC (sin leer los puntos)
+def leer_cabecera(las_file_path):
+    info = pdal.Pipeline(json.dumps([las_file_path])).quickinfo['readers.las']
+    limites = info['bounds']
+    return {
+        'minx': limites['minx'], 'miny': limites['miny'], 'maxx': limites['maxx'], 'maxy': limites['maxy'],
+        'num_points': info['num_points'],
+        'srs': info.get('srs', {}).get('wkt', '')
+    }
+
+# Catálogo persistente de cabeceras LAS; solo se vuelven a leer los archivos nuevos o modificados
+@instrumentado('catalogo_las')
+def catalogo_las(archivos_las, ruta_catalogo):
+    catalogo = {}
+    if os.path.exists(ruta_catalogo):
+        with open(ruta_catalogo, 'r') as f:
+            catalogo = json.load(f)
 
-        # Preguntar por el Sistema de Referencia de Coordenadas (SRC)
-        SRC = input("Sistema de Referencia de Coordenadas ej. (EPSG:XXXXX) solo números: ")
-        SRC_asignado = f"EPSG:{SRC.split(':')[-1]}"  # Asegura que esté en formato 'EPSG:XXXX'
-        print(f"Usted capturó {SRC_asignado}")
+    actualizado = {}
+    for archivo in tqdm(archivos_las, desc="Leyendo cabeceras LAS"):
+        info = os.stat(archivo)
+        entrada = catalogo.get(archivo)
+        if entrada is None or entrada['tamano'] != info.st_size or entrada['mtime_ns'] != info.st_mtime_ns:
+            entrada = leer_cabecera(archivo)
+            etapa_actual().contar(leidas=1)
+            entrada.update(tamano=info.st_size, mtime_ns=info.st_mtime_ns)
+        actualizado[archivo] = entrada
 
-        start_time = time.time()  # Marca el inicio del tiempo
+    with open(ruta_catalogo, 'w') as f:
+        json.dump(actualizado, f, indent=2)
 
-        # Convertir al CRS asignado si es necesario
+    return gpd.GeoDataFrame(
+        {'archivo': list(actualizado), 'num_points': [e['num_points'] for e in actualizado.values()],
+         'srs': [e['srs'] for e in actualizado.values()]},
+        geometry=[box(e['minx'], e['miny'], e['maxx'], e['maxy']) for e in actualizado.values()]
+    )
+
+# Tarea de recorte de un mosaico: copia directa si el polígono lo cubre, recorte PDAL en otro caso
+@instrumentado('recorte_mosaico', archivo='las_file_path')
+def recortar_mosaico(las_file_path, polygon_wkt, salida, copiar, tamano_stream=0):
+    if copiar:
+        shutil.copyfile(las_file_path, salida)
+        return salida
+    ejecutar_pipeline(pipeline_recorte(las_file_path, polygon_wkt, salida), tamano_stream)
+    return salida
+
+# Recorte por lotes: varios LAS contra varios polígonos usando el catálogo de cabeceras.
+# Con el índice espacial (R-tree) cada polígono se envía solo a los mosaicos que intersecta;
+# los mosaicos contenidos por completo se copian sin pasar por filters.crop.
+@instrumentado('recorte_lote')
+def recortar_lote(archivos_las, poligonos, carpeta_salida, procesos=1, tamano_stream=0, SRC_asignado=None):
+    catalogo = catalogo_las(archivos_las, os.path.join(os.path.dirname(archivos_las[0]) or '.', 'catalogo_las.json'))
+
+    # Avisar de mosaicos cuyo SRC no coincide con el de los polígonos
+    if SRC_asignado:
+        crs_poligonos = pyproj.CRS(SRC_asignado)
+        for archivo, srs in zip(catalogo['archivo'], catalogo['srs']):
+            if srs and not pyproj.CRS.from_wkt(srs).equals(crs_poligonos, ignore_axis_order=True):
+                print(f"Advertencia: el archivo {archivo} no está en {SRC_asignado}.")
+    tareas = []
+    omitidos = 0
+    for nombre, polygon in poligonos.items():
+        carpeta = os.path.join(carpeta_salida, f"{nombre}_recorte")
+        os.makedirs(carpeta, exist_ok=True)
+
+        indices = catalogo.sindex.query(polygon, predicate='intersects')
+        omitidos += len(catalogo) - len(indices)
+        for i in indices:
+            mosaico = catalogo.iloc[i]
+            copiar = polygon.contains(mosaico.geometry)
+            # Recortar con la parte del polígono que cae en el mosaico para simplificar filters.crop
+            parte = polygon if copiar else polygon.intersection(mosaico.geometry.buffer(1, join_style='mitre'))
+            salida = os.path.join(carpeta, os.path.basename(mosaico['archivo']).replace('.las', '_recortado.las'))
+            tareas.append((mosaico['archivo'], parte.wkt, salida, copiar))
+
+    copias = sum(1 for tarea in tareas if tarea[3])
+    etapa_actual().contar(mosaicos=len(catalogo), copias=copias, recortes=len(tareas) - copias, omitidas=omitidos)
+    print(f"{len(tareas)} combinaciones mosaico-polígono: {copias} copias directas, "
+          f"{len(tareas) - copias} recortes y {omitidos} omitidas por no intersectar.\n")
+
+    with ProcessPoolExecutor(max_workers=procesos) as executor:
+        futuros = [executor.submit(recortar_mosaico, *tarea, tamano_stream) for tarea in tareas]
+        for futuro in tqdm(as_completed(futuros), total=len(futuros), desc="Recortando mosaicos"):
+            futuro.result()
+
+    return [tarea[2] for tarea in tareas]
+
+# Modo por lotes interactivo
+def recortar_las_lote():
+    patron_las = input("Patrón de búsqueda de archivos LAS (ej. Bloque_*): ")
+    archivos_las = sorted(glob.glob(f"{patron_las}.las"))
+    if not archivos_las:
+        print(f"No se encontraron archivos LAS con el patrón '{patron_las}'.")
+        return
+    print(f"{len(archivos_las)} archivos LAS encontrados.\n")
+
+    nombres_shp = input("Nombres de archivos SHAPE separados por coma (sin extensión .shp): ")
+    SRC = input("Sistema de Referencia de Coordenadas ej. (EPSG:XXXXX) solo números: ")
+    SRC_asignado = f"EPSG:{SRC.split(':')[-1]}"
+
+    poligonos = {}
+    for nombre in [n.strip() for n in nombres_shp.split(',') if n.strip()]:
+        shp_file_path = f"{nombre}.shp"
+        if not os.path.exists(shp_file_path):
+            print(f"El archivo '{shp_file_path}' no existe, se omite.")
+            continue
+        shp_file = gpd.read_file(shp_file_path)
         if shp_file.crs != SRC_asignado:
-            shp_file = shp_file.to_crs(SRC_asignado)
-            print(f"CRS convertido a {SRC_asignado}\n")
+            shp_file = reproyectar_gdf(shp_file, SRC_asignado)
+        poligonos[nombre] = shp_file.geometry.union_all()
+
+    if not poligonos:
+        return
+
+    procesos = input(f"Número de procesos en paralelo (vacío para 1, este equipo tiene {os.cpu_count()} núcleos): ").strip()
+    procesos = int(procesos) if procesos else 1
+    tamano_stream = input("Tamaño de bloque en puntos para modo streaming (vacío para procesar en memoria): ").strip()
+    tamano_stream = int(tamano_stream) if tamano_stream else 0
+
+    start_time = time.time()
+    with etapa('CorteLAS'):
+        recortar_lote(archivos_las, poligonos, os.getcwd(), procesos, tamano_stream, SRC_asignado)
+    print(f"El script tardó {(time.time() - start_time) / 60:.2f} minutos en ejecutarse.")
+
+def recortar_las():
+    # Introduce nombre de archivo LAS
+    filename_las = input("Nombre de archivo LAS (sin extensión .las): ")
+    las_file_path = f"{filename_las}.las"
+
+    if os.path.exists(las_file_path):
+        print(f"Archivo capturado: {las_file_path} \n")
+
+        # Leer el archivo LAS usando PDAL
+        filename_SHP = input("Nombre de archivo SHAPE (sin extensión .shp): ")
+        shp_file_path = f"{filename_SHP}.shp"
+
+        if os.path.exists(shp_file_path):
+            print(f"Archivo capturado: {shp_file_path}\n")
+            # Cargar el archivo SHP como GeoDataFrame
+            shp_file = gpd.read_file(shp_file_path)
+
+            # Preguntar por el Sistema de Referencia de Coordenadas (SRC)
+            SRC = input("Sistema de Referencia de Coordenadas ej. (EPSG:XXXXX) solo números: ")
+            SRC_asignado = f"EPSG:{SRC.split(':')[-1]}"  # Asegura que esté en formato 'EPSG:XXXX'
+            print(f"Usted capturó {SRC_asignado}")
+
+            # Un recorte por cada polígono con una sola lectura de la nube
+            por_poligono = input("¿Generar un archivo recortado por cada polígono del shapefile? (si/no): ").strip().lower() in ['sí', 'si']
+            columna_nombre = None
+            if por_poligono:
+                print(f"Columnas disponibles: {', '.join(c for c in shp_file.columns if c != 'geometry')}")
+                columna_nombre = input("Columna para nombrar cada recorte (vacío para usar el número de polígono): ").strip() or None
+
+            # Procesos para recortar en paralelo
+            procesos = 1
+            if not por_poligono:
+                procesos = input(f"Número de procesos para recortar en paralelo (vacío para 1, este equipo tiene {os.cpu_count()} núcleos): ").strip()
+                procesos = int(procesos) if procesos else 1
+            conservar_bloques = False
+            if procesos > 1:
+                conservar_bloques = input("¿Conservar los bloques recortados por separado en lugar de unirlos? (si/no): ").strip().lower() in ['sí', 'si']
+
+            # Modo streaming: la memoria queda acotada por el tamaño de bloque y no por el archivo
+            tamano_stream = input("Tamaño de bloque en puntos para modo streaming (vacío para procesar en memoria): ").strip()
+            tamano_stream = int(tamano_stream) if tamano_stream else 0
+
+            # Estadísticas y malla de densidad calculadas en la misma pasada del recorte
+            tamano_celda = input("Tamaño de celda en metros para estadísticas y malla de densidad (vacío para no calcularlas): ").strip()
+            tamano_celda = float(tamano_celda) if tamano_celda else 0
+
+            # Índice COPC para que los recortes siguientes lean solo la zona del polígono
+            usar_copc = input("¿Usar índice COPC (se crea una sola vez) para leer solo la zona del polígono? (si/no): ").strip().lower() in ['sí', 'si']
+
+            start_time = time.time()  # Marca el inicio del tiempo
+            with etapa('CorteLAS', las_file_path):
+                # Convertir al CRS asignado si es necesario
+                if shp_file.crs != SRC_asignado:
+                    shp_file = reproyectar_gdf(shp_file, SRC_asignado)
+                    print(f"CRS convertido a {SRC_asignado}\n")
+                else:
+                    print("El archivo ya está en el CRS indicado.\n")
+
+                print("Ejecutando programa.")
+
+                # Obtener el polígono del shapefile
+                ##polygon = shp_file.geometry.unary_union  # Usamos unary_union para mayor eficiencia
+                polygon = shp_file.geometry.union_all()   # Usamos unary_union para mayor eficiencia
+                polygon_wkt = polygon.wkt  # Obtiene la representación WKT del polígono
+
+                salida = f"{filename_las}_recortado.las"
+
+                entrada = las_file_path
+                limites = None
+                if usar_copc:
+                    entrada = indexar_copc(las_file_path)
+                    limites = polygon.bounds
+                    if procesos > 1:
+                        print("Con índice COPC solo se leen los nodos del polígono; se usa un solo proceso.\n")
+                        procesos = 1
+
+                poligonos = nombres_poligonos(shp_file, columna_nombre) if por_poligono else {'recorte': polygon}
+                estadisticas = nuevas_estadisticas(poligonos, tamano_celda) if tamano_celda > 0 else None
+
+                if por_poligono:
+                    print("Iniciando recorte por polígono con una sola lectura...\n")
+                    recortar_por_poligono(entrada, poligonos, filename_las, tamano_stream or 1_000_000, estadisticas)
+                    salida = f"{filename_las}_<polígono>_recortado.las"
+                elif procesos > 1:
+                    print(f"Iniciando recorte en paralelo con {procesos} procesos...\n")
+                    recortar_en_paralelo(las_file_path, polygon_wkt, salida, procesos, conservar_bloques, tamano_stream, estadisticas)
+                else:
+                    # Crear el pipeline de PDAL
+                    pipeline = pipeline_recorte(entrada, polygon_wkt, salida, limites=limites)
+
+                    print("Iniciando ejecución del pipeline PDAL...\n")
+                    if tamano_stream > 0:
+                        # Con índice COPC solo se leen los nodos dentro de los límites: el total del archivo no aplica
+                        total_puntos = numero_de_puntos(entrada) if limites is None else None
+                        ejecutar_pipeline(pipeline, tamano_stream, total_puntos, estadisticas)
+                    else:
+                        for i in tqdm(range(1), desc="Procesando con PDAL"):
+
+                            # Ejecutar el pipeline
+                            ejecutar_pipeline(pipeline, estadisticas=estadisticas)
+
+                print(f"Archivo recortado guardado como '{salida}'")
+
+                if estadisticas is not None:
+                    guardar_estadisticas(estadisticas, f"{filename_las}_recortado", SRC_asignado)
+
+            # Calcular el tiempo total de ejecución (solo cuando los archivos existen y se hizo el recorte)
+            end_time = time.time()  # Marca el final del tiempo
+            elapsed_time = (end_time - start_time) / 60  # Calcula la diferencia
+            print(f"El script tardó {elapsed_time:.2f} minutos en ejecutarse.")
         else:
-            print("El archivo ya está en el CRS indicado.\n")
-
-        print("Ejecutando programa.")
-
-        # Obtener el polígono del shapefile
-        ##polygon = shp_file.geometry.unary_union  # Usamos unary_union para mayor eficiencia
-        polygon = shp_file.geometry.union_all()   # Usamos unary_union para mayor eficiencia
-        polygon_wkt = polygon.wkt  # Obtiene la representación WKT del polígono
-
-        # Crear el pipeline de PDAL
-        pipeline = f"""
-        {{
-            "pipeline": [
-                "{las_file_path}",
-                {{
-                    "type": "filters.crop",
-                    "polygon": "{polygon_wkt}"
-                }},
-                {{
-                    "type": "writers.las",
-                    "filename": "{filename_las}_recortado.las"
-                }}
-            ]
-        }}
-        """
-
-        print("Iniciando ejecución del pipeline PDAL...\n")
-        for i in tqdm(range(1), desc="Procesando con PDAL"):
-
-            # Ejecutar el pipeline
-            pipeline_obj = pdal.Pipeline(pipeline)
-            pipeline_obj.execute()
-
-        print(f"Archivo recortado guardado como '{filename_las}_recortado.las'")
+            print(f"El archivo '{shp_file_path}' no existe, revisar.")
+    else:
+        print(f"El archivo '{las_file_path}' no existe, revisar.")
+
+if __name__ == '__main__':
+    modo_lote = input("¿Recortar varios archivos LAS con varios polígonos (modo por lotes)? (si/no): ").strip().lower()
+    if modo_lote in ['sí', 'si']:
+        recortar_las_lote()
     else:
-        print(f"El archivo '{shp_file_path}' no existe, revisar.")
-else:
-    print(f"El archivo '{las_file_path}' no existe, revisar.")
-
-# Calcular el tiempo total de ejecución
-end_time = time.time()  # Marca el final del tiempo
-elapsed_time = (end_time - start_time) / 60  # Calcula la diferencia
-print(f"El script tardó {elapsed_time:.2f} minutos en ejecutarse.")
\ No newline at end of file
+        recortar_las()
+
@@ -0,0 +1,182 @@
+#Generador determinista de datos sintéticos para pruebas de rendimiento (Benchmark.py):
+#registros GNSS con vuelo en serpentina, capas de líneas de vuelo y nubes LAS pequeñas.
+#La misma semilla produce siempre los mismos archivos.
+import os
+import struct
+import numpy as np
+import shapely
+import geopandas as gpd
+from Formatos import ruta_capa, escribir_capa, FORMATOS
+
+# Tamaños predefinidos: épocas GNSS (líneas x puntos por línea), líneas del volumen (y vuelos en que
+# se reparten) y puntos LAS
+TAMANOS = {
+    'pequeno': {'lineas_gnss': 10, 'puntos_por_linea': 500, 'lineas_volumen': 100, 'vuelos': 4, 'puntos_las': 100_000},
+    'mediano': {'lineas_gnss': 40, 'puntos_por_linea': 2_000, 'lineas_volumen': 1_000, 'vuelos': 8, 'puntos_las': 1_000_000},
+    'grande': {'lineas_gnss': 100, 'puntos_por_linea': 10_000, 'lineas_volumen': 5_000, 'vuelos': 16, 'puntos_las': 5_000_000},
+}
+
+# Origen de la zona sintética en EPSG:4326 y en la proyección de las capas (UTM 14N)
+ORIGEN_GNSS = (-99.0, 19.0)
+SRC_CAPAS = "EPSG:32614"
+ORIGEN_CAPAS = (480_000.0, 2_100_000.0)
+
+# Trayectoria en serpentina: líneas paralelas recorridas en sentidos alternos unidas por giros
+# semicirculares. 'direccion' es 'N - S' (líneas a lo largo de la latitud) o 'E - W'.
+# Devuelve arreglos lon, lat en grados con ruido gaussiano de 'ruido' grados.
+def trayectoria_serpentina(lineas, puntos_por_linea, direccion='N - S', paso=1e-5, separacion=2e-3,
+                           puntos_giro=60, ruido=1e-7, semilla=0):
+    rng = np.random.default_rng(semilla)
+    largo = paso * (puntos_por_linea - 1)
+    avance = np.arange(puntos_por_linea) * paso
+    angulos = np.linspace(0, np.pi, puntos_giro + 2)[1:-1]
+    radio = separacion / 2
+
+    a_lo_largo, a_lo_ancho = [], []
+    for k in range(lineas):
+        sentido = 1 if k % 2 == 0 else -1
+        a_lo_largo.append(avance if sentido > 0 else largo - avance)
+        a_lo_ancho.append(np.full(puntos_por_linea, k * separacion))
+        if k < lineas - 1:
+            extremo = largo if sentido > 0 else 0.0
+            a_lo_largo.append(extremo + sentido * radio * np.sin(angulos))
+            a_lo_ancho.append(k * separacion + radio - radio * np.cos(angulos))
+
+    v = np.concatenate(a_lo_largo) + rng.normal(0, ruido, sum(map(len, a_lo_largo)))
+    u = np.concatenate(a_lo_ancho) + rng.normal(0, ruido, len(v))
+    if direccion == 'E - W':
+        return ORIGEN_GNSS[0] + v, ORIGEN_GNSS[1] + u
+    return ORIGEN_GNSS[0] + u, ORIGEN_GNSS[1] + v
+
+# Escribir un registro GNSS con la disposición que esperan los scripts (X, Y, Z en las columnas 2, 3, 4):
+# tiempo, estado, longitud, latitud, altura, satélites, precisión. Las 'filas_encabezado' iniciales
+# son épocas sin posición (Z negativa) que se eliminan con 'filas_a_eliminar'.
+def generar_gnss(ruta, lineas, puntos_por_linea, direccion='N - S', filas_encabezado=3, semilla=0):
+    rng = np.random.default_rng(semilla)
+    lon, lat = trayectoria_serpentina(lineas, puntos_por_linea, direccion, semilla=semilla)
+    n = len(lon)
+
+    datos = np.empty((filas_encabezado + n, 7))
+    datos[:filas_encabezado] = [0, 0, ORIGEN_GNSS[0] + 1, ORIGEN_GNSS[1] - 1, -5, 0, 0]
+    datos[filas_encabezado:, 0] = 400_000 + np.arange(n) * 0.1
+    datos[filas_encabezado:, 1] = 1
+    datos[filas_encabezado:, 2] = lon
+    datos[filas_encabezado:, 3] = lat
+    datos[filas_encabezado:, 4] = 2_000 + rng.normal(0, 1, n)
+    datos[filas_encabezado:, 5] = rng.integers(8, 20, n)
+    datos[filas_encabezado:, 6] = rng.uniform(0.005, 0.05, n)
+    np.savetxt(ruta, datos, fmt=['%.3f', '%d', '%.9f', '%.9f', '%.3f', '%d', '%.3f'])
+    return ruta
+
+# Capas de líneas de vuelo como las de Vuelos_producción: 'lineas' líneas de volumen (mitad N - S y
+# mitad E - W) de 'longitud' metros, cada una partida en 'vuelos' tramos separados por 'hueco' metros
+# (menos que la tolerancia de Lineas, así que se unen). En una fracción 'no_unidas' de las líneas el
+# primer tramo queda lejos del resto y no se une. Devuelve [(nombre, GeoDataFrame)] por vuelo.
+def lineas_de_vuelo_sinteticas(lineas, vuelos=4, longitud=2_000.0, separacion=50.0, hueco=5.0,
+                               vertices=10, no_unidas=0.1, semilla=0):
+    rng = np.random.default_rng(semilla)
+    n_ns = (lineas + 1) // 2
+    es_ns = np.arange(lineas) < n_ns
+    posicion = np.where(es_ns, np.arange(lineas), np.arange(lineas) - n_ns) * separacion
+    separada = rng.random(lineas) < no_unidas
+
+    tramo = longitud / vuelos
+    t = np.linspace(0, 1, vertices)
+    capas = []
+    for j in range(vuelos):
+        inicio = j * tramo + np.where(separada & (j == 1), 30 * hueco, 0)
+        fin = np.full(lineas, (j + 1) * tramo - hueco)
+        a_lo_largo = inicio[:, None] + (fin - inicio)[:, None] * t
+        a_lo_ancho = posicion[:, None] + rng.normal(0, 0.5, (lineas, vertices))
+        x = np.where(es_ns[:, None], a_lo_ancho, a_lo_largo) + ORIGEN_CAPAS[0]
+        y = np.where(es_ns[:, None], a_lo_largo, a_lo_ancho) + ORIGEN_CAPAS[1]
+
+        geometrias = shapely.linestrings(np.stack((x, y), axis=-1))
+        gdf = gpd.GeoDataFrame({'ID': np.arange(1, lineas + 1), 'dirección': np.where(es_ns, 'N - S', 'E - W')},
+                               geometry=geometrias, crs=SRC_CAPAS)
+        gdf['long_km'] = gdf.length / 1000
+        capas.append((f"GNSS_v{j + 1}_lineas", gdf[['ID', 'dirección', 'long_km', 'geometry']]))
+    return capas
+
+# Escribir las capas de vuelo en 'carpeta' con el formato indicado (Shapefile por defecto)
+def escribir_lineas_de_vuelo(carpeta, capas, formato='shp'):
+    os.makedirs(carpeta, exist_ok=True)
+    rutas = []
+    for nombre, gdf in capas:
+        rutas.append(ruta_capa(os.path.join(carpeta, nombre), formato))
+        escribir_capa(gdf, rutas[-1])
+    return rutas
+
+# Nube LAS 1.2 (formato de punto 0) escrita directamente con NumPy: terreno ondulado sobre 'limites'
+# (minx, miny, maxx, maxy) con clasificación suelo (2) / sin clasificar (1) y escala de 1 cm.
+# La fecha de creación de la cabecera es fija para que el archivo sea reproducible.
+def generar_las(ruta, puntos, limites, semilla=0):
+    rng = np.random.default_rng(semilla)
+    minx, miny, maxx, maxy = limites
+    x = rng.uniform(minx, maxx, puntos)
+    y = rng.uniform(miny, maxy, puntos)
+    z = 2_000 + 10 * np.sin((x - minx) / 200) * np.cos((y - miny) / 300) + rng.normal(0, 0.2, puntos)
+
+    escala = 0.01
+    desplazamiento = (float(np.floor(minx)), float(np.floor(miny)), 0.0)
+    registro = np.dtype([('X', '<i4'), ('Y', '<i4'), ('Z', '<i4'), ('intensidad', '<u2'), ('retorno', 'u1'),
+                         ('clase', 'u1'), ('angulo', 'i1'), ('usuario', 'u1'), ('fuente', '<u2')])
+    datos = np.zeros(puntos, dtype=registro)
+    datos['X'] = np.round((x - desplazamiento[0]) / escala)
+    datos['Y'] = np.round((y - desplazamiento[1]) / escala)
+    datos['Z'] = np.round((z - desplazamiento[2]) / escala)
+    datos['intensidad'] = rng.integers(0, 65_535, puntos)
+    datos['retorno'] = 1 | (1 << 3)  # Retorno 1 de 1
+    datos['clase'] = np.where(rng.random(puntos) < 0.7, 2, 1)
+
+    # Límites a partir de las coordenadas ya cuantizadas, como los calcula un lector LAS
+    xs, ys, zs = (datos[c] * escala + d for c, d in zip('XYZ', desplazamiento))
+    cabecera = struct.pack(
+        '<4sHH16sBB32s32sHHHIIBHI5I3d3d6d',
+        b'LASF', 0, 0, bytes(16), 1, 2, b'Datos_sinteticos', b'Datos_sinteticos', 1, 2024,
+        227, 227, 0, 0, registro.itemsize, puntos, puntos, 0, 0, 0, 0,
+        escala, escala, escala, *desplazamiento,
+        xs.max(), xs.min(), ys.max(), ys.min(), zs.max(), zs.min())
+    with open(ruta, 'wb') as f:
+        f.write(cabecera)
+        datos.tofile(f)
+    return ruta
+
+# Límites (en SRC_CAPAS) de la zona que cubren las líneas sintéticas
+def limites_lineas(lineas, longitud=2_000.0, separacion=50.0):
+    ancho = ((lineas + 1) // 2) * separacion
+    return (ORIGEN_CAPAS[0], ORIGEN_CAPAS[1], ORIGEN_CAPAS[0] + max(ancho, longitud), ORIGEN_CAPAS[1] + max(ancho, longitud))
+
+# Polígono de recorte: octágono centrado en los límites que cubre alrededor de la mitad de su área
+def poligono_recorte(limites):
+    minx, miny, maxx, maxy = limites
+    angulos = np.linspace(0, 2 * np.pi, 9)[:-1]
+    cx, cy = (minx + maxx) / 2, (miny + maxy) / 2
+    rx, ry = (maxx - minx) * 0.42, (maxy - miny) * 0.42
+    return shapely.Polygon(np.column_stack((cx + rx * np.cos(angulos), cy + ry * np.sin(angulos))))
+
+# Generar todos los datos de un tamaño en 'carpeta': registros GNSS (un vuelo N - S y uno E - W),
+# capas de vuelo en 'Vuelos_producción', la nube LAS y el polígono de recorte
+def generar_datos(carpeta, tamano='pequeno', formato='shp', semilla=0):
+    parametros = TAMANOS[tamano]
+    os.makedirs(carpeta, exist_ok=True)
+    for i, direccion in enumerate(['N - S', 'E - W'], start=1):
+        generar_gnss(os.path.join(carpeta, f"GNSS_v{i}.txt"), parametros['lineas_gnss'], parametros['puntos_por_linea'],
+                     direccion, semilla=semilla + i)
+
+    capas = lineas_de_vuelo_sinteticas(parametros['lineas_volumen'], parametros['vuelos'], semilla=semilla)
+    escribir_lineas_de_vuelo(os.path.join(carpeta, 'Vuelos_producción'), capas, formato)
+
+    limites = limites_lineas(parametros['lineas_volumen'])
+    generar_las(os.path.join(carpeta, 'Nube.las'), parametros['puntos_las'], limites, semilla)
+    escribir_capa(gpd.GeoDataFrame(geometry=[poligono_recorte(limites)], crs=SRC_CAPAS),
+                  os.path.join(carpeta, 'Recorte.shp'))
+
+if __name__ == '__main__':
+    carpeta = input("Carpeta de salida para los datos sintéticos: ").strip() or 'datos_sinteticos'
+    tamano = input(f"Tamaño ({'/'.join(TAMANOS)}, vacío para pequeno): ").strip().lower() or 'pequeno'
+    if tamano not in TAMANOS:
+        raise SystemExit(f"Tamaño no válido: {tamano}")
+    formato = input(f"Formato de las capas de vuelo ({'/'.join(FORMATOS)}, vacío para shp): ").strip().lower() or 'shp'
+    generar_datos(carpeta, tamano, formato)
+    print(f"Datos sintéticos '{tamano}' generados en {carpeta}")
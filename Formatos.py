@@ -0,0 +1,79 @@
+#Formatos de salida de capas vectoriales compartidos por todas las etapas (GeoParquet, FlatGeobuf o Shapefile)
+import os
+import geopandas as gpd
+from Instrumentacion import instrumentado, etapa_actual
+
+# Extensión por formato; el orden es también la prioridad al buscar una capa existente
+FORMATOS = {'parquet': '.parquet', 'fgb': '.fgb', 'shp': '.shp'}
+DRIVERS = {'.fgb': 'FlatGeobuf', '.shp': 'ESRI Shapefile'}
+# Opciones de creación por driver: sin índice espacial el FlatGeobuf conserva el orden de los registros,
+# del que dependen la numeración de grupos de Lineas y el orden de VolumenTotal.txt
+OPCIONES_DRIVER = {'.fgb': {'SPATIAL_INDEX': 'NO'}}
+EXTENSIONES_CAPA = tuple(FORMATOS.values())
+FORMATO_PREDETERMINADO = 'parquet'
+
+# Preguntar el formato de salida; GeoParquet por defecto y Shapefile como opción de exportación
+def pedir_formato():
+    while True:
+        formato = input(f"Formato de salida ({'/'.join(FORMATOS)}, vacío para {FORMATO_PREDETERMINADO}): ").strip().lower().lstrip('.')
+        if not formato:
+            return FORMATO_PREDETERMINADO
+        if formato in FORMATOS:
+            return formato
+        print(f"Por favor, ingrese un formato válido ({', '.join(FORMATOS)}).")
+
+# Ruta de una capa a partir de la ruta sin extensión y el formato
+def ruta_capa(ruta_base, formato):
+    return ruta_base + FORMATOS[formato]
+
+def es_capa(archivo):
+    return os.path.splitext(archivo)[1].lower() in EXTENSIONES_CAPA
+
+# Solo el Shapefile admite agregar registros a una capa ya escrita
+def admite_anexar(ruta):
+    return os.path.splitext(ruta)[1].lower() == '.shp'
+
+@instrumentado('escritura_capa', archivo='ruta')
+def escribir_capa(gdf, ruta, modo='w'):
+    etapa_actual().contar(registros=len(gdf))
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == '.parquet':
+        gdf.to_parquet(ruta, index=False)
+    else:
+        gdf.to_file(ruta, driver=DRIVERS[extension], mode=modo, **OPCIONES_DRIVER.get(extension, {}))
+
+# Leer una capa detectando el formato por su extensión ('encoding' solo aplica a Shapefile)
+@instrumentado('lectura_capa', archivo='ruta')
+def leer_capa(ruta, encoding=None):
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == '.parquet':
+        gdf = gpd.read_parquet(ruta)
+    elif extension == '.shp' and encoding:
+        gdf = gpd.read_file(ruta, encoding=encoding)
+    else:
+        gdf = gpd.read_file(ruta)
+    etapa_actual().contar(registros=len(gdf))
+    return gdf
+
+# Entre varias capas con la misma ruta base se usa la modificada más recientemente (con la misma fecha,
+# la de mayor prioridad en FORMATOS); las demás son salidas anteriores en otro formato y se ignoran con un aviso
+def elegir_capa(rutas):
+    prioridad = {extension: i for i, extension in enumerate(EXTENSIONES_CAPA)}
+    elegida = max(rutas, key=lambda ruta: (os.path.getmtime(ruta), -prioridad[os.path.splitext(ruta)[1].lower()]))
+    for ruta in rutas:
+        if ruta != elegida:
+            print(f"Aviso: se ignora '{ruta}', se usa la capa más reciente '{elegida}'.")
+    return elegida
+
+# Capa existente con la ruta base indicada (sin extensión), o None si no hay ninguna
+def buscar_capa(ruta_base):
+    rutas = [ruta_base + extension for extension in EXTENSIONES_CAPA if os.path.exists(ruta_base + extension)]
+    return elegir_capa(rutas) if rutas else None
+
+# Nombres de las capas de una carpeta en orden alfabético, una por ruta base
+def capas_de_carpeta(carpeta):
+    por_base = {}
+    for archivo in sorted(os.listdir(carpeta)):
+        if es_capa(archivo):
+            por_base.setdefault(os.path.splitext(archivo)[0], []).append(os.path.join(carpeta, archivo))
+    return sorted(os.path.basename(elegir_capa(rutas)) for rutas in por_base.values())
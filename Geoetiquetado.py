@@ -0,0 +1,147 @@
+#Programa que asigna posición, rumbo y línea de producción a cada foto interpolando la trayectoria GNSS
+import pandas as pd
+import geopandas as gpd
+import numpy as np
+import io
+import glob
+import os
+from Vuelos_produccion import calcular_rumbos
+from Proyecciones import transformar_coordenadas, reproyectar_gdf
+from Formatos import buscar_capa, leer_capa
+from Cache_GNSS import leer_columnas
+from Camaras import numerar_eventos, nombre_foto
+
+# Interpolar la trayectoria en los tiempos de los eventos de cámara (searchsorted + interpolación lineal).
+# El rumbo es el del tramo de trayectoria que contiene cada evento; fuera de la trayectoria se devuelve NaN.
+def interpolar_trayectoria(t_eventos, t, x, y, z):
+    t_eventos = np.asarray(t_eventos, dtype=float)
+    orden = np.argsort(t, kind='stable')
+    t, x, y, z = (np.asarray(v, dtype=float)[orden] for v in (t, x, y, z))
+
+    # Eliminar tiempos repetidos conservando el primer registro
+    unicos = np.concatenate(([True], np.diff(t) > 0))
+    t, x, y, z = t[unicos], x[unicos], y[unicos], z[unicos]
+
+    if len(t) < 2:
+        vacio = np.full(len(t_eventos), np.nan)
+        return vacio, vacio.copy(), vacio.copy(), vacio.copy()
+
+    k = np.clip(np.searchsorted(t, t_eventos, side='right') - 1, 0, len(t) - 2)
+    peso = (t_eventos - t[k]) / (t[k + 1] - t[k])
+    fuera = (t_eventos < t[0]) | (t_eventos > t[-1])
+
+    xi = x[k] + peso * (x[k + 1] - x[k])
+    yi = y[k] + peso * (y[k + 1] - y[k])
+    zi = z[k] + peso * (z[k + 1] - z[k])
+    rumbo = calcular_rumbos(x, y)[k]
+    for valores in (xi, yi, zi, rumbo):
+        valores[fuera] = np.nan
+    return xi, yi, zi, rumbo
+
+# Eventos de cámara como tabla y el nombre de la foto de cada fila, con la misma numeración que
+# Camaras.py (las líneas vacías no son eventos pero sí consumen un número de foto)
+def leer_eventos(archivo_camara):
+    with open(archivo_camara, 'r') as entrada:
+        numeradas = [(numero, linea) for numero, linea in numerar_eventos(entrada) if linea.strip()]
+    eventos = pd.read_csv(io.StringIO(''.join(linea for _, linea in numeradas)), sep=r'\s+', header=None)
+    return eventos, [nombre_foto(numero) for numero, _ in numeradas]
+
+# Archivo GNSS del vuelo de una cámara: Camara_v12.txt <-> {patrón}12.txt en cualquier subcarpeta.
+# Si hay varios se usa el de la carpeta de la cámara; si no, se avisa y se devuelve None.
+def buscar_gnss(archivo_camara, ruta_directorio, archivo_p):
+    sufijo = os.path.basename(archivo_camara)[len('Camara_v'):]
+    candidatos = sorted(glob.glob(os.path.join(ruta_directorio, f'**/{archivo_p}{sufijo}'), recursive=True))
+    if len(candidatos) > 1:
+        candidatos = [c for c in candidatos if os.path.dirname(c) == os.path.dirname(archivo_camara)] or candidatos
+    if not candidatos:
+        print(f"No se encontró el archivo GNSS '{archivo_p}{sufijo}' para {os.path.basename(archivo_camara)}.")
+        return None
+    if len(candidatos) > 1:
+        print(f"Hay varios archivos GNSS '{archivo_p}{sufijo}' para {os.path.basename(archivo_camara)}; "
+              f"deje solo uno: {', '.join(candidatos)}")
+        return None
+    return candidatos[0]
+
+# Línea de producción más cercana (dentro de 'tolerancia') a cada foto; 0 si no hay ninguna
+def asignar_lineas(puntos, lineas, tolerancia):
+    ids = np.zeros(len(puntos), dtype=np.int64)
+    validos = np.flatnonzero(np.isfinite(puntos.x.to_numpy()) & np.isfinite(puntos.y.to_numpy()))
+    if len(lineas) == 0 or len(validos) == 0:
+        return ids
+
+    idx_puntos, idx_lineas = lineas.sindex.nearest(puntos.iloc[validos], max_distance=tolerancia, return_all=False)
+    ids[validos[idx_puntos]] = lineas['ID'].to_numpy()[idx_lineas]
+    return ids
+
+def geoetiquetar_fotos():
+    ruta_directorio = os.getcwd()
+    carpeta_salida = os.path.join(ruta_directorio, 'Geoetiquetado')
+    os.makedirs(carpeta_salida, exist_ok=True)
+    carpeta_vuelos = os.path.join(ruta_directorio, 'Vuelos_producción')
+
+    archivos_camara = [a for a in glob.glob(os.path.join(ruta_directorio, 'Camara_v*.txt')) if not a.endswith('__.txt')]
+    if not archivos_camara:
+        print("No se encontraron archivos 'Camara_v*.txt'.")
+        return
+
+    archivo_p = input("Ingrese patrón de búsqueda de los archivos GNSS (ej. GNSS_v): ")
+
+    SRC = input("\nSistema de Referencia de Coordenadas ej. (EPSG:XXXXX) o dejar vacío para EPSG:4326: ")
+    SRC_asignado = f"EPSG:{SRC.strip()}" if SRC.strip() else "EPSG:4326"
+
+    cor_t_camara = int(input("Posición columna de tiempo en los archivos de cámara: "))
+    cor_t = int(input("Posición columna de tiempo GNSS: "))
+    cor_x = int(input("Posición columna X: "))
+    cor_y = int(input("Posición columna Y: "))
+    cor_z = int(input("Posición columna Z: "))
+    filas_a_eliminar = int(input("\n¿Cuántas filas iniciales desea eliminar del GNSS? (0 para no eliminar ninguna): "))
+    tolerancia = input("Distancia máxima a una línea de producción en unidades del SRC (vacío para 30): ").strip()
+    tolerancia = float(tolerancia) if tolerancia else 30.0
+    print("\n")
+
+    for archivo_camara in archivos_camara:
+        try:
+            # El archivo GNSS se empareja por el sufijo del vuelo
+            archivo_gnss = buscar_gnss(archivo_camara, ruta_directorio, archivo_p)
+            if archivo_gnss is None:
+                continue
+
+            # Eventos de cámara numerados igual que en Camaras.py
+            eventos, fotos = leer_eventos(archivo_camara)
+
+            # Trayectoria GNSS a través de la caché binaria compartida con Rutas y Vuelos_produccion
+            (t, tx, ty, tz), _ = leer_columnas(archivo_gnss, [cor_t, cor_x, cor_y, cor_z], filas_a_eliminar)
+            validos = tz >= 0
+
+            x, y, z, rumbo = interpolar_trayectoria(eventos[cor_t_camara].to_numpy(), t[validos],
+                                                    tx[validos], ty[validos], tz[validos])
+
+            px, py = transformar_coordenadas(x, y, "EPSG:4326", SRC_asignado)
+            gdf_fotos = gpd.GeoDataFrame({'foto': fotos, 'tiempo': eventos[cor_t_camara].to_numpy(), 'Z': z, 'rumbo': rumbo},
+                                         geometry=gpd.points_from_xy(px, py), crs=SRC_asignado)
+
+            # Línea de producción generada por Vuelos_produccion.py para el mismo vuelo
+            base_lineas = os.path.join(carpeta_vuelos, os.path.basename(archivo_gnss).replace('.txt', '_lineas'))
+            ruta_lineas = buscar_capa(base_lineas)
+            gdf_fotos['linea'] = 0
+            if ruta_lineas:
+                lineas = reproyectar_gdf(leer_capa(ruta_lineas), SRC_asignado)
+                gdf_fotos['linea'] = asignar_lineas(gdf_fotos.geometry, lineas, tolerancia)
+            else:
+                print(f"No existe la capa {base_lineas}; las fotos no se asignarán a líneas de producción.")
+
+            gdf_fotos['X'] = gdf_fotos.geometry.x
+            gdf_fotos['Y'] = gdf_fotos.geometry.y
+            nombre_salida = os.path.basename(archivo_camara).replace('.txt', '_geoetiquetado.csv')
+            gdf_fotos[['foto', 'tiempo', 'X', 'Y', 'Z', 'rumbo', 'linea']].to_csv(os.path.join(carpeta_salida, nombre_salida), index=False)
+
+            sin_posicion = int(np.isnan(z).sum())
+            print(f"Archivo {nombre_salida} guardado: {len(gdf_fotos)} fotos, {sin_posicion} fuera de la trayectoria, "
+                  f"{int((gdf_fotos['linea'] > 0).sum())} en líneas de producción")
+
+        except Exception as e:
+            print(f"Error al procesar el archivo {archivo_camara}: {str(e)}")
+
+# Ejecutar la función
+if __name__ == '__main__':
+    geoetiquetar_fotos()
@@ -0,0 +1,165 @@
+#Instrumentación compartida por etapa y por archivo: tiempo real, tiempo de CPU, memoria y conteos.
+#Se activa con la variable de entorno INSTRUMENTACION=<archivo.jsonl> ('-' para escribir en la consola de errores)
+#o con activar(). Cada etapa terminada agrega una línea JSON al archivo con su nombre ('etapa') y su ruta
+#completa ('ruta', p. ej. 'vuelo/lectura_gnss'); las etapas anidadas heredan el archivo de la que las contiene.
+#Los procesos del pool heredan la configuración y el identificador de ejecución por el entorno, así que todas
+#sus líneas se pueden agrupar.
+#Con INSTRUMENTACION_MEMORIA=1 se mide además el pico de memoria de Python/NumPy de cada etapa con
+#tracemalloc (hace más lento el proceso); el pico de RSS del proceso se reporta siempre que esté disponible.
+import os
+import sys
+import json
+import time
+import inspect
+import functools
+import threading
+import tracemalloc
+from contextlib import contextmanager
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+VARIABLE_DESTINO = 'INSTRUMENTACION'
+VARIABLE_MEMORIA = 'INSTRUMENTACION_MEMORIA'
+VARIABLE_EJECUCION = 'INSTRUMENTACION_EJECUCION'
+
+# Etapas abiertas en cada hilo
+_local = threading.local()
+
+def destino():
+    return os.environ.get(VARIABLE_DESTINO, '').strip()
+
+def activa():
+    return bool(destino())
+
+def medir_memoria():
+    return os.environ.get(VARIABLE_MEMORIA, '').strip() == '1'
+
+# Activar la instrumentación desde un script (por ejemplo con una opción de configuración)
+def activar(ruta, memoria=False):
+    os.environ[VARIABLE_DESTINO] = ruta if ruta == '-' else os.path.abspath(ruta)
+    if memoria:
+        os.environ[VARIABLE_MEMORIA] = '1'
+    identificador_ejecucion()
+
+# Identificador común a todas las líneas de una ejecución, incluidas las de los procesos hijos
+def identificador_ejecucion():
+    if VARIABLE_EJECUCION not in os.environ:
+        os.environ[VARIABLE_EJECUCION] = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+    return os.environ[VARIABLE_EJECUCION]
+
+# Pico de memoria residente del proceso hasta el momento (ru_maxrss está en KB en Linux y en bytes en macOS)
+def rss_pico_mb():
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / 1e6 if sys.platform == 'darwin' else pico / 1024
+
+class Etapa:
+    def __init__(self, nombre, archivo=None, ruta=None):
+        self.nombre = nombre
+        self.archivo = archivo
+        self.ruta = ruta or nombre
+        self.conteos = {}
+        self.pico_memoria = 0
+
+    # Sumar conteos de la etapa (filas, puntos, líneas...)
+    def contar(self, **conteos):
+        for nombre, valor in conteos.items():
+            self.conteos[nombre] = self.conteos.get(nombre, 0) + int(valor)
+
+# Etapa sin efecto que se entrega cuando la instrumentación está desactivada
+class EtapaInactiva:
+    nombre = archivo = ruta = None
+
+    def contar(self, **conteos):
+        pass
+
+_INACTIVA = EtapaInactiva()
+
+def _pila():
+    if not hasattr(_local, 'pila'):
+        _local.pila = []
+    return _local.pila
+
+# Etapa abierta más interna (para agregar conteos desde una función instrumentada)
+def etapa_actual():
+    pila = _pila()
+    return pila[-1] if pila and activa() else _INACTIVA
+
+def emitir(registro):
+    linea = json.dumps(registro, ensure_ascii=False, default=str)
+    if destino() == '-':
+        print(linea, file=sys.stderr, flush=True)
+        return
+    # Una sola escritura en modo anexar por línea para que varios procesos puedan compartir el archivo
+    with open(destino(), 'a', encoding='utf-8') as f:
+        f.write(linea + '\n')
+
+# Medir una etapa: with etapa('lectura', archivo) as medicion: ...; medicion.contar(filas=n)
+@contextmanager
+def etapa(nombre, archivo=None):
+    if not activa():
+        yield _INACTIVA
+        return
+
+    pila = _pila()
+    padre = pila[-1] if pila else None
+    actual = Etapa(nombre, archivo if archivo is not None else (padre.archivo if padre else None),
+                   f"{padre.ruta}/{nombre}" if padre else nombre)
+
+    memoria = medir_memoria()
+    if memoria:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        # El pico acumulado hasta aquí pertenece a la etapa que contiene a esta
+        if padre:
+            padre.pico_memoria = max(padre.pico_memoria, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        memoria_inicial = tracemalloc.get_traced_memory()[0]
+
+    pila.append(actual)
+    inicio = time.time()
+    inicio_real, inicio_cpu = time.perf_counter(), time.process_time()
+    error = None
+    try:
+        yield actual
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        tiempo, cpu = time.perf_counter() - inicio_real, time.process_time() - inicio_cpu
+        pila.pop()
+        registro = {
+            'ejecucion': identificador_ejecucion(), 'pid': os.getpid(), 'script': os.path.basename(sys.argv[0]),
+            'etapa': actual.nombre, 'ruta': actual.ruta, 'archivo': actual.archivo, 'inicio': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(inicio)),
+            'tiempo_s': round(tiempo, 6), 'cpu_s': round(cpu, 6), 'rss_pico_mb': rss_pico_mb(), 'conteos': actual.conteos
+        }
+        if memoria:
+            pico = max(actual.pico_memoria, tracemalloc.get_traced_memory()[1])
+            if padre:
+                padre.pico_memoria = max(padre.pico_memoria, pico)
+            registro['memoria_pico_mb'] = round((pico - memoria_inicial) / 1e6, 3)
+        if error:
+            registro['error'] = error
+        emitir(registro)
+
+# Decorador: mide cada llamada como una etapa. 'archivo' es el nombre del parámetro con la ruta del archivo
+# de entrada, para registrar la medición por archivo.
+def instrumentado(nombre=None, archivo=None):
+    def decorador(funcion):
+        firma = inspect.signature(funcion) if archivo else None
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not activa():
+                return funcion(*args, **kwargs)
+            ruta = firma.bind_partial(*args, **kwargs).arguments.get(archivo) if archivo else None
+            with etapa(nombre or funcion.__name__, ruta):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+if activa():
+    identificador_ejecucion()
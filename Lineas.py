@@ -1,189 +1,316 @@
 import geopandas as gpd
 import pandas as pd
+import numpy as np
+import shapely
 import os
-from shapely.geometry import Point, LineString
-
-# Definir las rutas de entrada y salida
-input_folder = 'Vuelos_producción'
-output_folder = 'Volumen de Obra'
-lineas_file = os.path.join(output_folder, 'Lineas.shp')  # Nueva ruta para el shapefile de líneas
-
-# Crear la carpeta de salida si no existe
-if not os.path.exists(output_folder):
-    os.makedirs(output_folder)
-
-# Leer y concatenar todos los shapefiles en el directorio de entrada
-all_shapes = []
-for file in os.listdir(input_folder):
-    if file.endswith('.shp'):
-        filepath = os.path.join(input_folder, file)
-        shp = gpd.read_file(filepath)
+import json
+from Formatos import pedir_formato, ruta_capa, escribir_capa, leer_capa, capas_de_carpeta
+from Instrumentacion import instrumentado, etapa_actual
+
+# Agrupar líneas conectadas: dos líneas quedan unidas si una está a menos de 'tolerancia'
+# de algún extremo de la otra. Los pares se obtienen con una sola consulta al índice espacial
+# y los componentes conexos se etiquetan con union-find vectorizado (enganche + salto de punteros).
+# Devuelve etiquetas 0..k-1 numeradas por orden de primera aparición.
+def agrupar_lineas_conectadas(geometrias, tolerancia=10):
+    geometrias = gpd.GeoSeries(geometrias).reset_index(drop=True)
+    n = len(geometrias)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+
+    extremos = np.concatenate((shapely.get_point(geometrias.values, 0), shapely.get_point(geometrias.values, -1)))
+    idx_extremo, idx_linea = geometrias.sindex.query(extremos, predicate='dwithin', distance=tolerancia)
+    a = idx_extremo % n
+    b = idx_linea
+
+    padre = np.arange(n)
+    while True:
+        raiz_a, raiz_b = padre[a], padre[b]
+        distintas = raiz_a != raiz_b
+        if not distintas.any():
+            break
+        # Enganchar la raíz mayor a la menor y comprimir hasta que cada nodo apunte a su raíz
+        np.minimum.at(padre, np.maximum(raiz_a, raiz_b)[distintas], np.minimum(raiz_a, raiz_b)[distintas])
+        while True:
+            abuelo = padre[padre]
+            if np.array_equal(abuelo, padre):
+                break
+            padre = abuelo
+
+    raices, primera, etiquetas = np.unique(padre, return_index=True, return_inverse=True)
+    orden = np.empty(len(raices), dtype=np.int64)
+    orden[np.argsort(primera)] = np.arange(len(raices))
+    return orden[etiquetas]
+
+# Posición (en el arreglo de coordenadas) del primer valor extremo de cada geometría,
+# igual que max()/min() de Python que devuelven la primera coincidencia
+def primer_extremo(valores, indices, n, extremo):
+    agrupado = np.full(n, -np.inf if extremo is np.maximum else np.inf)
+    extremo.at(agrupado, indices, valores)
+    posiciones = np.flatnonzero(valores == agrupado[indices])
+    _, primera = np.unique(indices[posiciones], return_index=True)
+    return posiciones[primera]
+
+# Puntos extremos (X para 'E - W', Y para las demás direcciones) y línea de dos puntos por ID.
+# Se trabaja sobre las coordenadas planas de todas las geometrías en una sola pasada.
+@instrumentado('extremos')
+def puntos_y_lineas_extremas(volumen_final):
+    etapa_actual().contar(lineas=len(volumen_final))
+    validas = volumen_final[volumen_final.geometry.geom_type.isin(['LineString', 'MultiLineString'])]
+    coords, indices = shapely.get_coordinates(validas.geometry.values, return_index=True)
+
+    es_ew = (validas['dirección'] == 'E - W').to_numpy()
+    valores = np.where(es_ew[indices], coords[:, 0], coords[:, 1])
+    presentes = np.unique(indices)
+
+    pos_max = primer_extremo(valores, indices, len(validas), np.maximum)
+    pos_min = primer_extremo(valores, indices, len(validas), np.minimum)
+
+    # Intercalar máximo y mínimo de cada ID
+    pares = np.column_stack((pos_max, pos_min)).ravel()
+    ids = np.repeat(validas['ID'].to_numpy()[presentes], 2)
+    tipos = np.where(np.repeat(es_ew[presentes], 2), np.tile(['max_x', 'min_x'], len(presentes)), np.tile(['max_y', 'min_y'], len(presentes)))
+    puntos_extremos = gpd.GeoDataFrame({'ID': ids, 'tipo': tipos},
+                                       geometry=gpd.points_from_xy(coords[pares, 0], coords[pares, 1]),
+                                       crs=volumen_final.crs)
+
+    lineas = shapely.linestrings(coords[pares], indices=np.repeat(np.arange(len(presentes)), 2))
+    lineas_gdf = gpd.GeoDataFrame({'ID': validas['ID'].to_numpy()[presentes]}, geometry=lineas, crs=volumen_final.crs)
+    return puntos_extremos, lineas_gdf
+
+# Versión del formato de la caché incremental; cambiarla invalida las cachés existentes
+VERSION_CACHE = 1
+
+# Huella de una capa de vuelo: tamaño y fecha de modificación del archivo (y del .dbf si es Shapefile)
+def huella_archivo(filepath):
+    huella = []
+    base, extension_capa = os.path.splitext(filepath)
+    for extension in ((extension_capa, '.dbf') if extension_capa.lower() == '.shp' else (extension_capa,)):
+        ruta = base + extension
+        if os.path.exists(ruta):
+            info = os.stat(ruta)
+            huella += [info.st_size, info.st_mtime_ns]
+    return huella
+
+# Cargar manifiesto, líneas por vuelo y grupos disueltos de la ejecución anterior
+def cargar_cache(carpeta_cache):
+    ruta_manifiesto = os.path.join(carpeta_cache, 'manifiesto.json')
+    if not os.path.exists(ruta_manifiesto):
+        return {}, None, None
+
+    try:
+        with open(ruta_manifiesto, 'r') as f:
+            manifiesto = json.load(f)
+        if manifiesto.get('version') != VERSION_CACHE:
+            return {}, None, None
+        volumen_cache = pd.read_pickle(os.path.join(carpeta_cache, 'volumen.pkl'))
+        disueltos_cache = pd.read_pickle(os.path.join(carpeta_cache, 'disueltos.pkl'))
+        return manifiesto['archivos'], volumen_cache, disueltos_cache
+    except Exception as e:
+        print(f"No se pudo leer la caché ({e}), se reconstruirá desde cero.")
+        return {}, None, None
+
+def guardar_cache(carpeta_cache, archivos, volumen, disueltos):
+    os.makedirs(carpeta_cache, exist_ok=True)
+    volumen.drop(columns=['grupo_cache']).to_pickle(os.path.join(carpeta_cache, 'volumen.pkl'))
+    disueltos.to_pickle(os.path.join(carpeta_cache, 'disueltos.pkl'))
+    with open(os.path.join(carpeta_cache, 'manifiesto.json'), 'w') as f:
+        json.dump({'version': VERSION_CACHE, 'archivos': archivos}, f, indent=2)
+
+# Concatenar las capas de vuelo (lista de (nombre, GeoDataFrame)) en un solo volumen.
+# Las líneas nuevas llevan 'grupo_cache' = -1; se usa igual para capas leídas de disco o generadas en memoria.
+def concatenar_volumen(capas):
+    all_shapes = []
+    for nombre, shp in capas:
+        shp = shp.copy()
+        shp['archivo'] = nombre
+        if 'grupo_cache' not in shp.columns:
+            shp['grupo_cache'] = -1
         all_shapes.append(shp)
+    return gpd.GeoDataFrame(pd.concat(all_shapes, ignore_index=True), crs=all_shapes[0].crs)
+
+# Leer y concatenar las capas de vuelo (GeoParquet, FlatGeobuf o Shapefile); los vuelos sin cambios se toman de la caché.
+# La columna 'grupo_cache' guarda el grupo anterior de cada línea (-1 para líneas leídas de nuevo).
+@instrumentado('lectura_volumen', archivo='input_folder')
+def leer_volumen(input_folder, archivos_cache=None, volumen_cache=None):
+    por_archivo = {}
+    if volumen_cache is not None:
+        por_archivo = dict(tuple(volumen_cache.groupby('archivo', sort=False)))
+
+    capas = []
+    archivos = {}
+    leidos = 0
+    # Una capa por vuelo: si quedó la salida de una ejecución anterior en otro formato, se usa la más reciente
+    for file in capas_de_carpeta(input_folder):
+        filepath = os.path.join(input_folder, file)
+        archivos[file] = huella_archivo(filepath)
 
-# Concatenar todos los shapefiles en un único GeoDataFrame
-volumen = gpd.GeoDataFrame(pd.concat(all_shapes, ignore_index=True), crs=all_shapes[0].crs)
-
-# Calcular la longitud de las geometrías y agregarla como columna
-volumen['long_km'] = volumen.geometry.length / 1000  # Convertir a kilómetros
-
-# Agregar columna 'grupo2' inicializada en -1 para indicar que aún no se ha asignado grupo
-volumen['grupo2'] = -1
-grupo_id = 0
-
-# Agrupar por cada valor único en la columna 'dirección'
-for direccion in volumen['dirección'].unique():
-    subset = volumen[volumen['dirección'] == direccion].copy()
-    subset_spatial_index = subset.sindex
-
-    for i, row in subset.iterrows():
-        if volumen.at[i, 'grupo2'] != -1:
-            continue
-
-        current_group = {i}
-        processed = set()
-
-        while current_group:
-            idx = current_group.pop()
-            processed.add(idx)
-
-            line = subset.geometry[idx]
-            start_point = Point(line.coords[0])
-            end_point = Point(line.coords[-1])
-
-            nearby_lines = subset.iloc[list(subset_spatial_index.intersection(start_point.buffer(10).bounds)) +
-                                       list(subset_spatial_index.intersection(end_point.buffer(10).bounds))]
-
-            nearby_lines = nearby_lines[(nearby_lines.geometry.distance(start_point) <= 10) |
-                                        (nearby_lines.geometry.distance(end_point) <= 10)]
-
-            for nearby_idx in nearby_lines.index:
-                if nearby_idx not in processed:
-                    current_group.add(nearby_idx)
-
-        for idx in processed:
-            volumen.at[idx, 'grupo2'] = grupo_id
-
-        grupo_id += 1
-
-# Filtrar líneas no unidas basadas en las preguntas del usuario
-def filtrar_lineas(direccion):
+        if archivos_cache and archivos_cache.get(file) == archivos[file] and file in por_archivo:
+            shp = por_archivo[file].rename(columns={'grupo2': 'grupo_cache'})
+        else:
+            shp = leer_capa(filepath)
+            leidos += 1
+        capas.append((file, shp))
+
+    print(f"Vuelos leídos: {leidos}, tomados de la caché: {len(capas) - leidos}")
+    volumen = concatenar_volumen(capas)
+    etapa_actual().contar(capas=len(capas), leidas=leidos, lineas=len(volumen))
+    return volumen, archivos
+
+# Asignar 'grupo2' por dirección, numerando los grupos en orden de primera aparición
+@instrumentado('agrupacion_grupo2')
+def asignar_grupos(volumen):
+    volumen['grupo2'] = -1
+    grupo_id = 0
+    for direccion in volumen['dirección'].unique():
+        subset = volumen[volumen['dirección'] == direccion]
+        etiquetas = agrupar_lineas_conectadas(subset.geometry)
+        volumen.loc[subset.index, 'grupo2'] = etiquetas + grupo_id
+        grupo_id += len(np.unique(etiquetas))
+    etapa_actual().contar(lineas=len(volumen), grupos=grupo_id)
+    return volumen
+
+# Disolver cada grupo; los grupos con los mismos miembros que en la caché se reutilizan.
+# La disolución es independiente por grupo, así que el resultado es idéntico al de una reconstrucción completa.
+@instrumentado('disolucion')
+def disolver_grupos(volumen, volumen_cache=None, disueltos_cache=None):
+    reutilizados = gpd.GeoDataFrame(columns=['grupo2', 'dirección', 'geometry'], geometry='geometry', crs=volumen.crs)
+    reutilizables = pd.Series(dtype=np.int64)
+
+    if disueltos_cache is not None:
+        tamano_anterior = volumen_cache['grupo2'].value_counts()
+        resumen = volumen.groupby('grupo2')['grupo_cache'].agg(['min', 'max', 'size'])
+        mismo_grupo = (resumen['min'] == resumen['max']) & (resumen['min'] >= 0)
+        mismo_tamano = resumen['size'].to_numpy() == tamano_anterior.reindex(resumen['min']).fillna(-1).to_numpy()
+        reutilizables = resumen.loc[mismo_grupo & mismo_tamano, 'min']
+
+        reutilizados = disueltos_cache.set_index('grupo2').loc[reutilizables.to_numpy()].reset_index(drop=True)
+        reutilizados.insert(0, 'grupo2', reutilizables.index.to_numpy())
+
+    pendientes = volumen[~volumen['grupo2'].isin(reutilizables.index)]
+    print(f"Grupos disueltos: {pendientes['grupo2'].nunique()}, tomados de la caché: {len(reutilizables)}")
+    etapa_actual().contar(disueltos=pendientes['grupo2'].nunique(), reutilizados=len(reutilizables))
+    if not pendientes.empty:
+        nuevos = pendientes.dissolve(by=['grupo2', 'dirección'], as_index=False)[['grupo2', 'dirección', 'geometry']]
+        reutilizados = pd.concat([reutilizados, nuevos], ignore_index=True)
+
+    disueltos = gpd.GeoDataFrame(reutilizados, geometry='geometry', crs=volumen.crs)
+    return disueltos.sort_values(by=['grupo2', 'dirección']).reset_index(drop=True)
+
+# Líneas de una dirección cuyo 'grupo2' no se repite (no se unieron con ninguna otra)
+def filtrar_lineas(volumen, direccion):
     return volumen[(volumen['dirección'] == direccion) & (volumen['grupo2'].duplicated(keep=False) == False)]
 
-if 'N - S' in volumen['dirección'].values:
+# Preguntar si se eliminan las líneas no unidas de una dirección
+def preguntar_eliminacion(direccion):
     while True:
-        respuesta_ns = input("¿Deseas eliminar líneas no unidas para dirección N - S? (sí/no): ")
-        if respuesta_ns.lower() in ['sí', 'si']:
-            volumen = volumen[~volumen.index.isin(filtrar_lineas('N - S').index)]
-            break
-        elif respuesta_ns.lower() == 'no':
-            break
+        respuesta = input(f"¿Deseas eliminar líneas no unidas para dirección {direccion}? (sí/no): ")
+        if respuesta.lower() in ['sí', 'si']:
+            return True
+        elif respuesta.lower() == 'no':
+            return False
         else:
             print("No se capturó respuesta")
 
-if 'E - W' in volumen['dirección'].values:
+# Eliminar las líneas no unidas de cada dirección según 'decidir(direccion)' (N - S, luego E - W, luego las demás)
+def eliminar_no_unidas(volumen, decidir):
+    direcciones = [d for d in ['N - S', 'E - W'] if d in volumen['dirección'].values]
+    direcciones += [d for d in volumen['dirección'].unique() if d not in ['N - S', 'E - W']]
+    for direccion in direcciones:
+        if decidir(direccion):
+            volumen = volumen[~volumen.index.isin(filtrar_lineas(volumen, direccion).index)]
+    return volumen
+
+# Unir las líneas de cada 'grupo2', ordenarlas por dirección y asignar el ID final
+@instrumentado('ordenamiento')
+def ordenar_volumen(volumen, disueltos):
+    # Realizar un merge para las líneas con el mismo valor en 'grupo2' y conservar la dirección
+    volumen_merged = disueltos[disueltos['grupo2'].isin(volumen['grupo2'])].reset_index(drop=True)
+
+    # Calcular la longitud de las geometrías después de la disolución
+    volumen_merged['long_km'] = volumen_merged.geometry.length / 1000  # Recalcular long_km
+
+    # Asegurarse de que 'dirección' y 'long_km' estén disponibles para el siguiente paso
+    volumen_merged = volumen_merged[['grupo2', 'dirección', 'geometry', 'long_km']].copy()
+
+    # Calcular centroides antes de ordenar
+    centroides = volumen_merged.geometry.centroid
+    volumen_merged['centroid_x'] = centroides.x
+    volumen_merged['centroid_y'] = centroides.y
+
+    # Asignar el nuevo ID en base a la prioridad de orden y dirección
+    volumen_ns = volumen_merged[volumen_merged['dirección'] == 'N - S'].sort_values(by='centroid_x')
+    volumen_ew = volumen_merged[volumen_merged['dirección'] == 'E - W'].sort_values(by='centroid_y', key=lambda y: -y)
+    volumen_otros = volumen_merged[~volumen_merged['dirección'].isin(['N - S', 'E - W'])].sort_values(by='centroid_y')
+
+    # Concatenar el orden final y asignar ID
+    volumen_ordenado = pd.concat([volumen_ns, volumen_ew, volumen_otros], ignore_index=True)
+    volumen_ordenado['ID'] = range(1, len(volumen_ordenado) + 1)
+    etapa_actual().contar(lineas=len(volumen_ordenado))
+
+    # Conservar solo las columnas ID, dirección y long_km
+    return volumen_ordenado[['ID', 'dirección', 'long_km', 'geometry']]
+
+# Etapa completa sobre un volumen ya leído: agrupar, disolver, eliminar no unidas, ordenar y líneas extremas.
+# Devuelve (lineas_gdf, volumen, disueltos); volumen y disueltos sirven para guardar la caché.
+def generar_lineas(volumen, decidir, volumen_cache=None, disueltos_cache=None):
+    # Calcular la longitud de las geometrías y agregarla como columna
+    volumen['long_km'] = volumen.geometry.length / 1000  # Convertir a kilómetros
+
+    # Agrupar por cada valor único en la columna 'dirección'
+    volumen = asignar_grupos(volumen)
+
+    # Disolver todos los grupos (reutilizando la caché)
+    disueltos = disolver_grupos(volumen, volumen_cache, disueltos_cache)
+
+    # Filtrar líneas no unidas basadas en las decisiones del usuario
+    volumen_filtrado = eliminar_no_unidas(volumen, decidir)
+    volumen_final = ordenar_volumen(volumen_filtrado, disueltos)
+
+    # Puntos extremos y líneas entre ellos
+    # No se guardará el shapefile de Puntos_Extremos
+    _, lineas_gdf = puntos_y_lineas_extremas(volumen_final)
+
+    # Agregar la columna 'dirección' al GeoDataFrame de líneas
+    lineas_gdf['dirección'] = volumen_final.loc[lineas_gdf['ID'] - 1, 'dirección'].values
+    return lineas_gdf, volumen, disueltos
+
+def crear_lineas():
+    # Definir las rutas de entrada y salida
+    input_folder = 'Vuelos_producción'
+    output_folder = 'Volumen de Obra'
+
+    # Crear la carpeta de salida si no existe
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    carpeta_cache = os.path.join(output_folder, 'cache_lineas')
+
+    # Reconstrucción incremental: solo se leen los vuelos nuevos o modificados y solo se disuelven los grupos que cambiaron
+    archivos_cache, volumen_cache, disueltos_cache = {}, None, None
     while True:
-        respuesta_ew = input("¿Deseas eliminar líneas no unidas para dirección E - W? (sí/no): ")
-        if respuesta_ew.lower() in ['sí', 'si']:
-            volumen = volumen[~volumen.index.isin(filtrar_lineas('E - W').index)]
+        respuesta_cache = input("¿Deseas usar la caché incremental de vuelos ya procesados? (sí/no): ")
+        if respuesta_cache.lower() in ['sí', 'si']:
+            archivos_cache, volumen_cache, disueltos_cache = cargar_cache(carpeta_cache)
             break
-        elif respuesta_ew.lower() == 'no':
+        elif respuesta_cache.lower() == 'no':
             break
         else:
             print("No se capturó respuesta")
 
-direcciones_otros = volumen['dirección'].unique()
-for direccion in direcciones_otros:
-    if direccion not in ['N - S', 'E - W']:
-        while True:
-            respuesta_otros = input(f"¿Deseas eliminar líneas no unidas para dirección {direccion}? (sí/no): ")
-            if respuesta_otros.lower() in ['sí', 'si']:
-                volumen = volumen[~volumen.index.isin(filtrar_lineas(direccion).index)]
-                break
-            elif respuesta_otros.lower() == 'no':
-                break
-            else:
-                print("No se capturó respuesta")
-
-# Realizar un merge para las líneas con el mismo valor en 'grupo2' y conservar la dirección
-volumen_merged = volumen.dissolve(by=['grupo2', 'dirección'], as_index=False)
-
-# Calcular la longitud de las geometrías después de la disolución
-volumen_merged['long_km'] = volumen_merged.geometry.length / 1000  # Recalcular long_km
-
-# Asegurarse de que 'dirección' y 'long_km' estén disponibles para el siguiente paso
-volumen_merged = volumen_merged[['grupo2', 'dirección', 'geometry', 'long_km']].copy()
-
-# Calcular centroides antes de ordenar
-volumen_merged['centroid'] = volumen_merged.geometry.centroid
-
-# Asignar el nuevo ID en base a la prioridad de orden y dirección
-volumen_ns = volumen_merged[volumen_merged['dirección'] == 'N - S'].sort_values(by='centroid', key=lambda g: g.apply(lambda geom: geom.x))
-volumen_ew = volumen_merged[volumen_merged['dirección'] == 'E - W'].sort_values(by='centroid', key=lambda g: g.apply(lambda geom: -geom.y))
-volumen_otros = volumen_merged[~volumen_merged['dirección'].isin(['N - S', 'E - W'])].sort_values(by='centroid', key=lambda g: g.apply(lambda geom: geom.y))
-
-# Concatenar el orden final y asignar ID
-volumen_ordenado = pd.concat([volumen_ns, volumen_ew, volumen_otros], ignore_index=True)
-volumen_ordenado['ID'] = range(1, len(volumen_ordenado) + 1)
-
-# Conservar solo las columnas ID, dirección y long_km
-volumen_final = volumen_ordenado[['ID', 'dirección', 'long_km', 'geometry']]
-
-# Crear un GeoDataFrame para almacenar los puntos extremos
-# No se guardará el shapefile de Puntos_Extremos
-puntos_extremos = gpd.GeoDataFrame(columns=['ID', 'tipo', 'geometry'], crs=volumen_final.crs)
-
-# Agregar puntos extremos basados en la dirección
-for idx, row in volumen_final.iterrows():
-    puntos = []
-
-    # Obtener las coordenadas de cada segmento según el tipo de geometría
-    if row.geometry.geom_type == 'LineString':
-        coords = list(row.geometry.coords)
-    elif row.geometry.geom_type == 'MultiLineString':
-        coords = [pt for line in row.geometry.geoms for pt in line.coords]
-    else:
-        continue  # Ignorar geometrías no compatibles
-
-    # Procesar según la etiqueta de dirección
-    if row['dirección'] == 'E - W':
-        # Para 'E - W': seleccionar puntos extremos en X
-        max_x_point = Point(max(coords, key=lambda c: c[0]))  # Punto con X máximo
-        min_x_point = Point(min(coords, key=lambda c: c[0]))  # Punto con X mínimo
-        puntos.append({'ID': row['ID'], 'tipo': 'max_x', 'geometry': max_x_point})
-        puntos.append({'ID': row['ID'], 'tipo': 'min_x', 'geometry': min_x_point})
-
-    else:
-        # Para 'N - S' u otras direcciones: seleccionar puntos extremos en Y
-        max_y_point = Point(max(coords, key=lambda c: c[1]))  # Punto con Y máximo
-        min_y_point = Point(min(coords, key=lambda c: c[1]))  # Punto con Y mínimo
-        puntos.append({'ID': row['ID'], 'tipo': 'max_y', 'geometry': max_y_point})
-        puntos.append({'ID': row['ID'], 'tipo': 'min_y', 'geometry': min_y_point})
-
-    # Agregar los puntos al GeoDataFrame utilizando pd.concat
-    puntos_extremos = pd.concat([puntos_extremos, gpd.GeoDataFrame(puntos, crs=volumen_final.crs)], ignore_index=True)
-
-# Crear líneas a partir de los puntos extremos
-lineas = []
-
-# Agrupar puntos extremos por ID
-for id_val in puntos_extremos['ID'].unique():
-    subset = puntos_extremos[puntos_extremos['ID'] == id_val]
-    if len(subset) >= 2:  # Debe haber al menos 2 puntos para formar una línea
-        coords = list(subset.geometry.apply(lambda geom: (geom.x, geom.y)))
-        line = LineString(coords)
-        lineas.append({'ID': id_val, 'geometry': line})
-
-# Crear un GeoDataFrame de líneas
-lineas_gdf = gpd.GeoDataFrame(lineas, crs=volumen_final.crs)
-
-# Agregar la columna 'dirección' al GeoDataFrame de líneas
-lineas_gdf['dirección'] = volumen_final.loc[lineas_gdf['ID'] - 1, 'dirección'].values
-
-# Guardar el shapefile de líneas
-lineas_gdf.to_file(lineas_file, driver='ESRI Shapefile')
-
-# Eliminar capas Puntos_Extremos y Volumen al final
-del puntos_extremos
-del volumen
-
-print("Shapefile de líneas guardado exitosamente.")
+    # Formato de la capa de líneas de salida
+    formato = pedir_formato()
+    lineas_file = ruta_capa(os.path.join(output_folder, 'Lineas'), formato)  # Nueva ruta para la capa de líneas
+
+    # Leer y concatenar todas las capas en el directorio de entrada
+    volumen, archivos = leer_volumen(input_folder, archivos_cache, volumen_cache)
+
+    # Procesar preguntando por las líneas no unidas de cada dirección y guardar la caché para la siguiente ejecución
+    lineas_gdf, volumen, disueltos = generar_lineas(volumen, preguntar_eliminacion, volumen_cache, disueltos_cache)
+    guardar_cache(carpeta_cache, archivos, volumen, disueltos)
+
+    # Guardar la capa de líneas en el formato elegido
+    escribir_capa(lineas_gdf, lineas_file)
+    print(f"Capa de líneas guardada exitosamente en {lineas_file}.")
+
+if __name__ == '__main__':
+    crear_lineas()
@@ -0,0 +1,152 @@
+#Ejecución sin interfaz de Vuelos_produccion -> Lineas -> Volumen con un archivo de configuración JSON.
+#Las etapas se pasan los GeoDataFrames en memoria; solo se escriben los productos finales
+#(y los intermedios si 'guardar_intermedios' es verdadero).
+#Uso: python Pipeline.py configuracion.json
+import os
+import sys
+import json
+import glob
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from Vuelos_produccion import lineas_de_archivo
+from Lineas import concatenar_volumen, generar_lineas
+from Volumen import puntos_extremos, generar_poligono, exportar_lineas
+from Formatos import ruta_capa, escribir_capa, FORMATO_PREDETERMINADO
+from Instrumentacion import activar, etapa
+
+# Valores por defecto de la configuración; el archivo JSON solo necesita las claves que cambian
+CONFIGURACION_BASE = {
+    'directorio': '.',                    # Carpeta donde se buscan los archivos GNSS
+    'patron': 'GNSS_v',                   # Patrón de búsqueda de los archivos GNSS
+    'epsg': '',                           # Solo números; vacío para EPSG:4326
+    'columnas': [2, 3, 4],                # Posición de las columnas X, Y, Z
+    'filas_a_eliminar': 0,
+    'procesos': 1,
+    'eliminar_no_unidas': {'N - S': False, 'E - W': False, 'otras': False},
+    'formato': FORMATO_PREDETERMINADO,    # parquet, fgb o shp
+    'carpeta_salida': 'Volumen de Obra',
+    'guardar_intermedios': False,         # Capas de Vuelos_producción, Reporte.txt y capa Lineas
+    'generar_poligono': True,             # Area.kml y Área.txt con todos los puntos extremos
+    'modo_poligono': 'vecino',            # vecino (anillo de máximos y mínimos) o concavo
+    'ratio_concavo': 0.3,                 # Solo para modo 'concavo' (0 a 1, 1 = envolvente convexa)
+    'kmz': False,                         # Lineas.kmz comprimido en lugar de Lineas.kml
+    'instrumentacion': '',                # Archivo .jsonl con las mediciones por etapa (vacío para no medir)
+}
+
+def cargar_configuracion(ruta):
+    with open(ruta, 'r', encoding='utf-8') as f:
+        configuracion = json.load(f)
+    desconocidas = set(configuracion) - set(CONFIGURACION_BASE)
+    if desconocidas:
+        raise ValueError(f"Claves desconocidas en la configuración: {', '.join(sorted(desconocidas))}")
+    return {**CONFIGURACION_BASE, **configuracion}
+
+# Etapa 1: líneas de producción de cada vuelo en memoria (en paralelo si 'procesos' > 1)
+def etapa_vuelos(configuracion, SRC_asignado):
+    directorio = configuracion['directorio']
+    archivos_txt = sorted(glob.glob(os.path.join(directorio, f"**/{configuracion['patron']}*.txt"), recursive=True))
+    if not archivos_txt:
+        raise SystemExit(f"No se encontraron archivos con el patrón '{configuracion['patron']}'.")
+
+    cor_x, cor_y, cor_z = configuracion['columnas']
+    procesar = partial(lineas_de_archivo, SRC_asignado=SRC_asignado, cor_x=cor_x, cor_y=cor_y, cor_z=cor_z,
+                       filas_a_eliminar=configuracion['filas_a_eliminar'])
+
+    vuelos = []
+    procesos = configuracion['procesos']
+    executor = ProcessPoolExecutor(max_workers=procesos) if procesos > 1 else None
+    try:
+        resultados = executor.map(procesar, archivos_txt) if executor else map(procesar, archivos_txt)
+        for archivo, (resultado, error) in zip(archivos_txt, resultados):
+            if error is not None:
+                print(f"Error al procesar el archivo {archivo}: {error}")
+            elif resultado is None:
+                print(f"El archivo {archivo} no tiene suficientes columnas para procesar.")
+            else:
+                vuelos.append((archivo, *resultado))
+    finally:
+        if executor:
+            executor.shutdown()
+    return vuelos
+
+# Capas de Vuelos_producción y Reporte.txt, iguales a las de Vuelos_produccion.py
+def guardar_vuelos(vuelos, configuracion):
+    carpeta_vuelos = os.path.join(configuracion['directorio'], 'Vuelos_producción')
+    os.makedirs(carpeta_vuelos, exist_ok=True)
+    suma_total_longitudes = 0
+    with open(os.path.join(carpeta_vuelos, 'Reporte.txt'), 'a') as f:
+        for archivo, direction, gdf_lineas in vuelos:
+            nombre = os.path.basename(archivo).replace('.txt', '')
+            escribir_capa(gdf_lineas, ruta_capa(os.path.join(carpeta_vuelos, f"{nombre}_lineas"), configuracion['formato']))
+            suma_longitudes = gdf_lineas['long_km'].sum()
+            suma_total_longitudes += suma_longitudes
+            f.write(f"Vuelo: {nombre} con dirección {direction} y longitud total de líneas de producción {suma_longitudes:.3f} km\n")
+        f.write(f"Total de todas las longitudes: {suma_total_longitudes:.3f} km\n")
+
+# Etapa 2: agrupar, disolver y ordenar las líneas con las decisiones de la configuración
+def etapa_lineas(vuelos, configuracion):
+    decisiones = configuracion['eliminar_no_unidas']
+    decidir = lambda direccion: bool(decisiones.get(direccion, decisiones.get('otras', False)))
+
+    capas = [(os.path.basename(archivo).replace('.txt', '_lineas'), gdf_lineas) for archivo, _, gdf_lineas in vuelos]
+    lineas_gdf, _, _ = generar_lineas(concatenar_volumen(capas), decidir)
+    return lineas_gdf
+
+# Etapa 3: productos de Volumen sin la ventana de selección (KML/KMZ, VolumenTotal.txt y polígono de área)
+def etapa_volumen(lineas_gdf, configuracion, carpeta_salida):
+    lineas_gdf = lineas_gdf.copy()
+    lineas_gdf['Long_km'] = lineas_gdf.geometry.length / 1000  # Longitud en km
+
+    if configuracion['generar_poligono']:
+        generar_poligono(puntos_extremos(lineas_gdf), [], carpeta_salida,
+                         configuracion['modo_poligono'], configuracion['ratio_concavo'])
+    exportar_lineas(lineas_gdf, os.path.join(carpeta_salida, 'Lineas.kmz' if configuracion['kmz'] else 'Lineas.kml'),
+                    os.path.join(carpeta_salida, 'VolumenTotal.txt'))
+
+def ejecutar_pipeline(configuracion):
+    if configuracion['instrumentacion']:
+        activar(configuracion['instrumentacion'])
+    SRC_asignado = f"EPSG:{str(configuracion['epsg']).split(':')[-1].strip()}" if str(configuracion['epsg']).strip() else "EPSG:4326"
+    carpeta_salida = os.path.join(configuracion['directorio'], configuracion['carpeta_salida'])
+    os.makedirs(carpeta_salida, exist_ok=True)
+
+    tiempos = {}
+    inicio = time.perf_counter()
+    with etapa('Vuelos_produccion') as medicion:
+        vuelos = etapa_vuelos(configuracion, SRC_asignado)
+        if configuracion['guardar_intermedios']:
+            guardar_vuelos(vuelos, configuracion)
+        medicion.contar(archivos=len(vuelos))
+    tiempos['Vuelos_produccion'] = time.perf_counter() - inicio
+    print(f"Vuelos procesados: {len(vuelos)} en {tiempos['Vuelos_produccion']:.2f} s\n")
+    if not vuelos:
+        return tiempos
+
+    inicio = time.perf_counter()
+    with etapa('Lineas') as medicion:
+        lineas_gdf = etapa_lineas(vuelos, configuracion)
+        if configuracion['guardar_intermedios']:
+            escribir_capa(lineas_gdf, ruta_capa(os.path.join(carpeta_salida, 'Lineas'), configuracion['formato']))
+        medicion.contar(lineas=len(lineas_gdf))
+    tiempos['Lineas'] = time.perf_counter() - inicio
+    print(f"Líneas de volumen: {len(lineas_gdf)} en {tiempos['Lineas']:.2f} s\n")
+
+    inicio = time.perf_counter()
+    with etapa('Volumen'):
+        etapa_volumen(lineas_gdf, configuracion, carpeta_salida)
+    tiempos['Volumen'] = time.perf_counter() - inicio
+    print(f"Productos de volumen generados en {tiempos['Volumen']:.2f} s\n")
+
+    print("Tiempos por etapa:")
+    for nombre, segundos in tiempos.items():
+        print(f"  {nombre}: {segundos:.2f} s")
+    print(f"  Total: {sum(tiempos.values()):.2f} s")
+    return tiempos
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print("Uso: python Pipeline.py configuracion.json\nEjemplo de configuración:")
+        print(json.dumps(CONFIGURACION_BASE, indent=2, ensure_ascii=False))
+        sys.exit(1)
+    ejecutar_pipeline(cargar_configuracion(sys.argv[1]))
@@ -0,0 +1,60 @@
+#Servicio de proyecciones compartido: transformadores pyproj en caché y reproyección de arreglos de coordenadas
+from functools import lru_cache
+import numpy as np
+import shapely
+import pyproj
+from pyproj import Transformer
+
+# Clave normalizada de un SRC ('EPSG:XXXX', número EPSG o pyproj.CRS)
+def clave_src(src):
+    if isinstance(src, str):
+        return src.upper()
+    if isinstance(src, (int, np.integer)):
+        return f"EPSG:{int(src)}"
+    return pyproj.CRS.from_user_input(src).to_wkt()
+
+# Un transformador por par (origen, destino) para todo el proceso; se reutiliza entre archivos y etapas
+@lru_cache(maxsize=None)
+def _transformador(origen, destino):
+    return Transformer.from_crs(origen, destino, always_xy=True)
+
+def obtener_transformador(origen, destino):
+    return _transformador(clave_src(origen), clave_src(destino))
+
+@lru_cache(maxsize=None)
+def _mismo_src(origen, destino):
+    return origen == destino or pyproj.CRS.from_user_input(origen) == pyproj.CRS.from_user_input(destino)
+
+def mismo_src(origen, destino):
+    return _mismo_src(clave_src(origen), clave_src(destino))
+
+# Reproyectar arreglos X/Y en bloque. Con 'en_sitio' los arreglos (float64 y escribibles) se sobrescriben.
+def transformar_coordenadas(x, y, origen, destino, en_sitio=False):
+    if mismo_src(origen, destino):
+        return x, y
+    transformador = obtener_transformador(origen, destino)
+    if en_sitio:
+        return transformador.transform(x, y, inplace=True)
+    return transformador.transform(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+
+# Reproyectar un arreglo de geometrías transformando su búfer de coordenadas en una sola llamada
+def reproyectar_geometrias(geometrias, origen, destino):
+    if mismo_src(origen, destino):
+        return geometrias
+    transformador = obtener_transformador(origen, destino)
+
+    def transformar(coordenadas):
+        x = np.ascontiguousarray(coordenadas[:, 0])
+        y = np.ascontiguousarray(coordenadas[:, 1])
+        transformador.transform(x, y, inplace=True)
+        return np.column_stack((x, y))
+
+    return shapely.transform(np.asarray(geometrias), transformar)
+
+# Equivalente a gdf.to_crs(destino) usando el transformador en caché
+def reproyectar_gdf(gdf, destino):
+    if gdf.crs is None or mismo_src(gdf.crs, destino):
+        return gdf
+    resultado = gdf.copy()
+    resultado[gdf.geometry.name] = reproyectar_geometrias(gdf.geometry.values, gdf.crs, destino)
+    return resultado.set_crs(destino, allow_override=True)
@@ -0,0 +1,37 @@
+#Funciones compartidas para convertir archivos GNSS en puntos (Rutas.py y RutasMaster.py)
+import geopandas as gpd
+import numpy as np
+from Proyecciones import transformar_coordenadas
+from Cache_GNSS import leer_columnas
+from Instrumentacion import instrumentado, etapa_actual
+
+# Leer un archivo GNSS (a través de la caché binaria) y devolver las columnas X, Y, Z como arreglos,
+# o None si no tiene suficientes columnas. 'filtrar_z' descarta las épocas con Z negativa
+# (igual que RutasMaster y Vuelos_produccion)
+@instrumentado('lectura_gnss', archivo='archivo')
+def leer_gnss(archivo, cor_x=2, cor_y=3, cor_z=4, filas_a_eliminar=0, filtrar_z=False):
+    columnas, n_columnas = leer_columnas(archivo, [cor_x, cor_y, cor_z], filas_a_eliminar)
+    if n_columnas < 5:
+        return None
+
+    x, y, z = columnas
+    etapa_actual().contar(filas=len(z))
+    if filtrar_z:
+        validos = z >= 0
+        return x[validos], y[validos], z[validos]
+    return x, y, z
+
+# GeoDataFrame de puntos construido con points_from_xy a partir de los arreglos ya filtrados y reproyectados.
+# Las columnas X, Y, Z conservan los valores originales del archivo; 'atributos' agrega columnas extra.
+@instrumentado('puntos_gnss')
+def puntos_gnss(x, y, z, SRC_asignado, mascara=None, atributos=None):
+    atributos = dict(atributos or {})
+    if mascara is not None:
+        x, y, z = x[mascara], y[mascara], z[mascara]
+        atributos = {nombre: np.asarray(valores)[mascara] for nombre, valores in atributos.items()}
+
+    etapa_actual().contar(puntos=len(x))
+    px, py = transformar_coordenadas(x, y, "EPSG:4326", SRC_asignado)
+    datos = {'X': x, 'Y': y, 'Z': z}
+    datos.update(atributos)
+    return gpd.GeoDataFrame(datos, geometry=gpd.points_from_xy(px, py), crs=SRC_asignado)
@@ -1,7 +1,7 @@
 #Programa que crea rutas completas a partir de puntos de archivo GNSS
-import pandas as pd
-import geopandas as gpd
-from shapely.geometry import Point
+from Puntos_GNSS import leer_gnss, puntos_gnss
+from Formatos import pedir_formato, ruta_capa, escribir_capa
+from Instrumentacion import etapa
 import glob
 import os
 
@@ -32,42 +32,32 @@ def crear_shps_gnss():
         SRC_asignado = f"EPSG:{SRC.strip()}"
         print(f"Datos reproyectados a {SRC_asignado} \n")
 
-    for archivo in archivos_txt:
-        # Leer el archivo .txt
-        df = pd.read_csv(archivo, sep=r'\s+', header=None)
+    formato = pedir_formato()
 
-        # Verificar si hay suficientes columnas
-        if df.shape[1] < 5:
-            print(f"El archivo {archivo} no tiene suficientes columnas para procesar.")
-            continue
+    with etapa('Rutas') as medicion_total:
+        for archivo in archivos_txt:
+            with etapa('ruta', archivo) as medicion:
+                # Leer el archivo .txt (X=columna 2, Y=columna 3, Z=columna 4)
+                coordenadas = leer_gnss(archivo)
 
-        # Eliminar columnas que no sean de coordenadas (asumiendo que X=columna 2, Y=columna 3, Z=columna 4)
-        df_coordenadas = df[[2, 3, 4]].copy()
+                # Verificar si hay suficientes columnas
+                if coordenadas is None:
+                    print(f"El archivo {archivo} no tiene suficientes columnas para procesar.")
+                    continue
 
-        # Renombrar las columnas
-        df_coordenadas.columns = ['X', 'Y', 'Z']
+                # Crear los puntos reproyectando primero los arreglos de coordenadas
+                gdf = puntos_gnss(*coordenadas, SRC_asignado)
 
-        # Crear geometría de puntos
-        geometry = [Point(xy) for xy in zip(df_coordenadas['X'], df_coordenadas['Y'])]
+                # Generar el nombre del archivo de salida
+                ruta_salida = ruta_capa(os.path.join(carpeta_shapes, os.path.splitext(os.path.basename(archivo))[0]), formato)
+                nombre_archivo_salida = os.path.basename(ruta_salida)
 
-        # Crear un GeoDataFrame
-        gdf = gpd.GeoDataFrame(df_coordenadas, geometry=geometry)
-
-        # Asignar el sistema de referencia de coordenadas (SRC ingresado por el usuario)
-        gdf.set_crs("EPSG:4326", inplace=True)  # Asignar inicialmente como EPSG:4326
-
-        # Si se ingresó un SRC diferente, reproyectar
-        if SRC_asignado != "EPSG:4326":
-            gdf = gdf.to_crs(SRC_asignado)
-            #print(f"Datos reproyectados a {SRC_asignado}")
-
-        # Generar el nombre del archivo .shp
-        nombre_archivo_salida = os.path.splitext(os.path.basename(archivo))[0] + '.shp'
-        ruta_salida = os.path.join(carpeta_shapes, nombre_archivo_salida)
-
-        # Guardar como archivo .shp
-        gdf.to_file(ruta_salida, driver='ESRI Shapefile')
-        print(f"Archivo {nombre_archivo_salida} guardado exitosamente en Shapes")
+                # Guardar en el formato elegido
+                escribir_capa(gdf, ruta_salida)
+                medicion.contar(puntos=len(gdf))
+                medicion_total.contar(archivos=1, puntos=len(gdf))
+                print(f"Archivo {nombre_archivo_salida} guardado exitosamente en Shapes")
 
 # Ejemplo de uso
-crear_shps_gnss()
\ No newline at end of file
+if __name__ == '__main__':
+    crear_shps_gnss()
@@ -1,6 +1,9 @@
 import pandas as pd
-import geopandas as gpd
-from shapely.geometry import Point
+import numpy as np
+from Puntos_GNSS import leer_gnss, puntos_gnss
+from Formatos import pedir_formato, ruta_capa, escribir_capa
+from Vuelos_produccion import calcular_rumbos_y_grupos, segmentar_corridas, filtrar_segmentos, filas_de_segmentos
+from Instrumentacion import etapa
 import glob
 import os
 
@@ -33,64 +36,55 @@ def crear_shps_gnss():
 
     # Preguntar cuántas filas del inicio eliminar
     filas_a_eliminar = int(input("\n¿Cuántas filas iniciales desea eliminar? (0 para no eliminar ninguna): "))
+    formato = pedir_formato()
     print("\n")
 
-    for archivo in archivos_txt:
-        # Leer el archivo .txt
-        df = pd.read_csv(archivo, sep=r'\s+', header=None)
-        if filas_a_eliminar > 0:
-            df = df.iloc[filas_a_eliminar:]  # Eliminar las filas iniciales
-
-        df = df[df[cor_z] >= 0]
-
-        # Verificar si hay suficientes columnas
-        if df.shape[1] < 5:
-            print(f"El archivo {archivo} no tiene suficientes columnas para procesar.")
-            continue
-
-        # Eliminar columnas que no sean de coordenadas
-        df_coordenadas = df[[cor_x, cor_y, cor_z]].copy()
-
-        # Renombrar las columnas
-        df_coordenadas.columns = ['X', 'Y', 'Z']
-
-        # Crear geometría de puntos
-        geometry = [Point(xy) for xy in zip(df_coordenadas['X'], df_coordenadas['Y'])]
-
-        # Crear un GeoDataFrame
-        gdf = gpd.GeoDataFrame(df_coordenadas, geometry=geometry)
-
-        # Asignar el sistema de referencia de coordenadas (SRC ingresado por el usuario)
-        gdf.set_crs("EPSG:4326", inplace=True)  # Asignar inicialmente como EPSG:4326
-
-        # Si se ingresó un SRC diferente, reproyectar
-        if SRC_asignado != "EPSG:4326":
-            gdf = gdf.to_crs(SRC_asignado)
-
-        # Agregar la columna 'fil3' basada en los valores de 'Fil'
-        df['fil3'] = None
-        df.loc[df['Fil'].notnull() & df['fil2'] != 0, 'fil3'] = df['Fil'].apply(
-            lambda x: 'N-S' if x in [90, 270] else ('E-W' if x in [180, 360] else None)
-        )
-
-        # Realizar un conteo en 'fil3' y filtrar las filas con el mayor conteo
-        if 'fil3' in df.columns:
-            max_label = df['fil3'].value_counts().idxmax()  # Obtener la etiqueta con el mayor conteo
-            df_filtrada = df[df['fil3'] == max_label]  # Filtrar las filas con esa etiqueta
-        else:
-            df_filtrada = df
-
-        # Guardar el archivo filtrado como shapefile
-        gdf_filtrada = gpd.GeoDataFrame(df_filtrada, geometry=geometry)
-        gdf_filtrada.set_crs(SRC_asignado, inplace=True)
-
-        # Generar el nombre del archivo .shp
-        nombre_archivo_salida = os.path.splitext(os.path.basename(archivo))[0] + '_filtrada.shp'
-        ruta_salida = os.path.join(carpeta_shapes, nombre_archivo_salida)
-
-        # Guardar como archivo .shp
-        gdf_filtrada.to_file(ruta_salida, driver='ESRI Shapefile')
-        print(f"Archivo {nombre_archivo_salida} guardado exitosamente en la carpeta 'Rutas'")
+    with etapa('RutasMaster') as medicion_total:
+        for archivo in archivos_txt:
+            with etapa('ruta_filtrada', archivo) as medicion:
+                # Leer el archivo .txt eliminando las filas iniciales y las épocas con Z negativa
+                coordenadas = leer_gnss(archivo, cor_x, cor_y, cor_z, filas_a_eliminar, filtrar_z=True)
+
+                # Verificar si hay suficientes columnas
+                if coordenadas is None:
+                    print(f"El archivo {archivo} no tiene suficientes columnas para procesar.")
+                    continue
+                x, y, z = coordenadas
+
+                # 'Fil': grupo de rumbo de los dos grupos más frecuentes; 'fil2': segmento conservado (0 si no)
+                _, grupos = calcular_rumbos_y_grupos(x, y)
+                mayores = pd.Series(grupos).value_counts().nlargest(2).index.tolist()
+                fil = np.where(np.isin(grupos, mayores), grupos, np.nan)
+
+                ids, longitudes, inicios, finales = filtrar_segmentos(*segmentar_corridas(~np.isnan(fil)))
+                fil2 = np.zeros(len(fil), dtype=np.int64)
+                fil2[filas_de_segmentos(inicios, finales, len(fil))] = np.repeat(ids, finales - inicios)
+
+                # Agregar la columna 'fil3' basada en los valores de 'Fil'
+                fil3 = np.full(len(fil), None, dtype=object)
+                en_segmento = ~np.isnan(fil) & (fil2 != 0)
+                fil3[en_segmento & np.isin(fil, [90, 270])] = 'N-S'
+                fil3[en_segmento & np.isin(fil, [180, 360])] = 'E-W'
+
+                # Filtrar las filas con la etiqueta de mayor conteo (todas si no hay etiquetas)
+                conteo_etiquetas = pd.Series(fil3).value_counts()
+                mascara = fil3 == conteo_etiquetas.idxmax() if len(conteo_etiquetas) else None
+
+                # Crear los puntos filtrados con la máscara, sin reconstruir geometrías
+                gdf_filtrada = puntos_gnss(x, y, z, SRC_asignado, mascara=mascara,
+                                           atributos={'Fil': fil, 'fil2': fil2, 'fil3': fil3})
+
+                # Generar el nombre del archivo de salida
+                ruta_salida = ruta_capa(os.path.join(carpeta_shapes, os.path.splitext(os.path.basename(archivo))[0] + '_filtrada'), formato)
+                nombre_archivo_salida = os.path.basename(ruta_salida)
+
+                # Guardar en el formato elegido
+                escribir_capa(gdf_filtrada, ruta_salida)
+                medicion.contar(puntos=len(x), conservados=len(gdf_filtrada), segmentos=len(ids))
+                medicion_total.contar(archivos=1, puntos=len(gdf_filtrada))
+                print(f"Archivo {nombre_archivo_salida} guardado exitosamente en la carpeta 'Rutas'")
 
 # Ejemplo de uso
-crear_shps_gnss()
+if __name__ == '__main__':
+    crear_shps_gnss()
+
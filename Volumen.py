@@ -1,170 +1,170 @@
 import os
+import math
+import numpy as np
+import shapely
 import geopandas as gpd
-import matplotlib.pyplot as plt
+from scipy.spatial import cKDTree
 from shapely.geometry import Point, Polygon
 import pandas as pd
-from mpl_interactions import panhandler, zoom_factory
-from matplotlib.widgets import RectangleSelector, Button
-from pykml.factory import KML_ElementMaker as KML
+import zipfile
 from lxml import etree
+from lxml.builder import E
+from Proyecciones import transformar_coordenadas
+from Formatos import pedir_formato, ruta_capa, escribir_capa, leer_capa, buscar_capa
+from Instrumentacion import instrumentado, etapa_actual
 
 # Configuración de rutas
 script_dir = os.path.dirname(os.path.abspath(__file__))
-lineas_path = os.path.join(script_dir, 'Volumen de obra', 'Lineas.shp')
-volumen_total_path = os.path.join(script_dir, 'Volumen de obra', 'VolumenTotal.txt')
-kml_path = os.path.join(script_dir, 'Volumen de obra', 'Lineas.kml')
-puntos_path = os.path.join(script_dir, 'Volumen de obra', 'Puntos.shp')
-area_txt_path = os.path.join(script_dir, 'Volumen de obra', 'Área.txt')  # Archivo de área
-
-# Preguntar si se desea aplicar una codificación específica
-while True:
-    codificacion = input("¿Desea aplicar una codificación específica para leer el shapefile? (si/no): ").strip().lower()
-    if codificacion in ("si", "no"):
-        break
-    print("Por favor, ingrese una respuesta válida ('si' o 'no').")
-
-# Leer el shapefile con o sin codificación
-if codificacion == "si":
-    while True:
-        encoding_option = input("Seleccione la codificación:\n1. latin1\n2. utf-8\nIngrese su opción (1 o 2): ").strip()
-        if encoding_option == "1":
-            encoding = "latin1"
-            break
-        elif encoding_option == "2":
-            encoding = "utf-8"
+carpeta_volumen = os.path.join(script_dir, 'Volumen de obra')
+
+# Espacio de nombres del KML y líneas por bloque al escribirlo
+KML_NS = "http://www.opengis.net/kml/2.2"
+LINEAS_POR_BLOQUE = 10_000
+
+# Leer la capa de líneas (GeoParquet, FlatGeobuf o Shapefile) preguntando la codificación si es Shapefile
+def leer_lineas(carpeta=carpeta_volumen):
+    lineas_path = buscar_capa(os.path.join(carpeta, 'Lineas'))
+    if lineas_path is None:
+        raise SystemExit(f"No se encontró la capa Lineas (.parquet, .fgb o .shp) en '{carpeta}'.")
+
+    # Preguntar si se desea aplicar una codificación específica (solo el Shapefile la necesita)
+    codificacion = "no"
+    while lineas_path.lower().endswith('.shp'):
+        codificacion = input("¿Desea aplicar una codificación específica para leer el shapefile? (si/no): ").strip().lower()
+        if codificacion in ("si", "no"):
             break
-        print("Por favor, ingrese una opción válida (1 o 2).")
-
-    lineas_gdf = gpd.read_file(lineas_path, encoding=encoding)
-else:
-    lineas_gdf = gpd.read_file(lineas_path)
-
-
-
-lineas_gdf['Long_km'] = lineas_gdf.geometry.length / 1000  # Longitud en km
-
-# Extracción de puntos extremos
-max_min_points = []
-for idx, row in lineas_gdf.iterrows():
-    coords = list(row.geometry.coords)
-    min_point = Point(coords[0])  # Punto de inicio
-    max_point = Point(coords[-1])  # Punto de fin
-    max_min_points.extend([(min_point, 'Min', idx), (max_point, 'Max', idx)])
-
-points_df = pd.DataFrame(max_min_points, columns=['geometry', 'type', 'line_id'])
-points_gdf = gpd.GeoDataFrame(points_df, geometry='geometry', crs=lineas_gdf.crs)
-
-# Variables de selección de puntos
-selected_points = []
-applied_selection = False
-
-# Funciones de selección de puntos
-def onselect(eclick, erelease):
-    x_min, x_max = sorted([eclick.xdata, erelease.xdata])
-    y_min, y_max = sorted([eclick.ydata, erelease.ydata])
-
-    for i, point in enumerate(points_gdf.geometry):
-        if x_min <= point.x <= x_max and y_min <= point.y <= y_max:
-            if i not in selected_points:
-                selected_points.append(i)
-    update_plot()
-
-def update_plot():
-    xlim = ax.get_xlim()
-    ylim = ax.get_ylim()
-
-    ax.clear()
-    colors = ['blue' if i not in selected_points else 'red' for i in range(len(points_gdf))]
-    points_gdf.plot(ax=ax, color=colors, label='Puntos Máximos y Mínimos')
-
-    ax.set_xlim(xlim)
-    ax.set_ylim(ylim)
-    ax.set_title("Selecciona los puntos para excluir", pad=20)
-    ax.set_xlabel("Coordenada X")
-    ax.set_ylabel("Coordenada Y")
-
-    if any(colors):
-        plt.legend(['Puntos Máximos y Mínimos'], loc='upper right')
-
-    plt.draw()
-
-def export_points():
+        print("Por favor, ingrese una respuesta válida ('si' o 'no').")
+
+    # Leer el shapefile con o sin codificación
+    if codificacion == "si":
+        while True:
+            encoding_option = input("Seleccione la codificación:\n1. latin1\n2. utf-8\nIngrese su opción (1 o 2): ").strip()
+            if encoding_option == "1":
+                encoding = "latin1"
+                break
+            elif encoding_option == "2":
+                encoding = "utf-8"
+                break
+            print("Por favor, ingrese una opción válida (1 o 2).")
+
+        return leer_capa(lineas_path, encoding=encoding)
+    return leer_capa(lineas_path)
+
+# Extracción de puntos extremos (inicio 'Min' y fin 'Max' de cada línea)
+@instrumentado('puntos_extremos')
+def puntos_extremos(lineas_gdf):
+    etapa_actual().contar(lineas=len(lineas_gdf))
+    max_min_points = []
+    for idx, row in lineas_gdf.iterrows():
+        coords = list(row.geometry.coords)
+        min_point = Point(coords[0])  # Punto de inicio
+        max_point = Point(coords[-1])  # Punto de fin
+        max_min_points.extend([(min_point, 'Min', idx), (max_point, 'Max', idx)])
+
+    points_df = pd.DataFrame(max_min_points, columns=['geometry', 'type', 'line_id'])
+    return gpd.GeoDataFrame(points_df, geometry='geometry', crs=lineas_gdf.crs)
+
+def export_points(points_gdf, selected_points, carpeta=carpeta_volumen):
     # Pedir al usuario el nombre del archivo
     nombre_archivo = input("Ingrese el nombre para el archivo de puntos exportado (sin extensión): ")
-    export_path = os.path.join(script_dir, 'Volumen de obra', f"{nombre_archivo}.shp")
+    export_path = ruta_capa(os.path.join(carpeta, nombre_archivo), pedir_formato())
 
     # Exportar solo puntos no seleccionados
     export_gdf = points_gdf.drop(selected_points)
     print("Exportando solo puntos no seleccionados.")
-    export_gdf.to_file(export_path, driver='ESRI Shapefile')
+    escribir_capa(export_gdf, export_path)
     print(f"Capa de puntos exportada exitosamente a {export_path}.")
 
-# Funciones de botones
-def on_button_unmark(event):
-    selected_points.clear()
-    update_plot()
+# Recorrido por vecino más cercano sobre un KD-tree, partiendo de 'actual' y visitando todos los 'puntos'.
+# Equivale al bucle distance/idxmin: a igual distancia gana el punto que aparece primero en 'puntos'.
+# Los puntos visitados se saltan ampliando la consulta y el árbol se reconstruye al quedar medio vacío.
+# El cuerpo del bucle trabaja con escalares de Python: con pocos vecinos por paso es más rápido que NumPy.
+def recorrido_vecino_mas_cercano(puntos, actual):
+    n = len(puntos)
+    orden = []
+    visitado = [False] * n
+    xs, ys = puntos[:, 0].tolist(), puntos[:, 1].tolist()
+    ax, ay = float(actual[0]), float(actual[1])
+    indices = np.arange(n)
+    arbol = cKDTree(puntos) if n else None
+    visitados_en_arbol = 0
+
+    while len(orden) < n:
+        k = 2
+        while True:
+            k = min(k, len(indices))
+            distancias, vecinos = arbol.query((ax, ay), k=k)
+            distancias = np.atleast_1d(distancias).tolist()
+            vecinos = indices[np.atleast_1d(vecinos)].tolist()
+            libres = [(d, v) for d, v in zip(distancias, vecinos) if not visitado[v]]
+            if libres:
+                break
+            k *= 2
+
+        # Candidatos a la distancia mínima (con holgura por redondeo); si el empate puede continuar
+        # fuera de los k vecinos consultados se buscan todos los puntos dentro de ese radio
+        radio = libres[0][0] * (1 + 1e-9) + 1e-12
+        if distancias[-1] <= radio and k < len(indices):
+            candidatos = [v for v in indices[arbol.query_ball_point((ax, ay), radio)].tolist() if not visitado[v]]
+        else:
+            candidatos = [v for d, v in libres if d <= radio]
+
+        # Distancia exacta como la calcula GEOS; a igual distancia, el primero en 'puntos'
+        if len(candidatos) == 1:
+            elegido = candidatos[0]
+        else:
+            elegido = min(candidatos, key=lambda v: (math.sqrt((xs[v] - ax) ** 2 + (ys[v] - ay) ** 2), v))
+
+        orden.append(elegido)
+        visitado[elegido] = True
+        ax, ay = xs[elegido], ys[elegido]
+        visitados_en_arbol += 1
+        if visitados_en_arbol * 2 > len(indices) and len(orden) < n:
+            indices = np.flatnonzero(~np.array(visitado))
+            arbol = cKDTree(puntos[indices])
+            visitados_en_arbol = 0
+    return np.array(orden, dtype=np.int64)
+
+# Anillo del polígono de área: puntos máximos desde el de menor X por vecino más cercano y luego los mínimos
+def anillo_vecino_mas_cercano(max_xy, min_xy):
+    max_xy = max_xy[np.argsort(max_xy[:, 0], kind='quicksort')]  # Mismo orden que sort_values(by='x')
+    orden_max = recorrido_vecino_mas_cercano(max_xy[1:], max_xy[0])
+    max_ordenados = np.vstack((max_xy[:1], max_xy[1:][orden_max]))
+    min_ordenados = min_xy[recorrido_vecino_mas_cercano(min_xy, max_ordenados[-1])]
 
-def on_button_export(event):
-    export_points()
-
-# Función para generar el polígono
-def generate_polygon(event):
+    # Cerrar el polígono uniendo el último punto mínimo al primer punto máximo
+    return np.vstack((max_ordenados, min_ordenados, max_ordenados[:1]))
+
+# Generar el polígono de área con los puntos no seleccionados; guarda Area.kml y Área.txt.
+# modo 'vecino': anillo por vecino más cercano (máximos y luego mínimos);
+# modo 'concavo': envolvente cóncava de todos los puntos ('ratio' entre 0 y 1, 1 = envolvente convexa).
+# Devuelve el GeoDataFrame del polígono, o None si no hay puntos máximos.
+@instrumentado('poligono_area')
+def generar_poligono(points_gdf, selected_points, carpeta=carpeta_volumen, modo='vecino', ratio=0.3):
     # Filtrar solo los puntos que no han sido seleccionados
     available_points = points_gdf.drop(selected_points)
-
-    # Crear columnas 'x' y 'y' con las coordenadas de cada punto
-    available_points['x'] = available_points.geometry.x
-    available_points['y'] = available_points.geometry.y
-
-    # Filtrar y ordenar puntos máximos en función de 'x'
-    max_points = available_points[available_points['type'] == 'Max'].sort_values(by='x')
-    min_points = available_points[available_points['type'] == 'Min']
+    coordenadas = shapely.get_coordinates(available_points.geometry.values)
+    es_max = (available_points['type'] == 'Max').to_numpy()
+    etapa_actual().contar(puntos=len(coordenadas))
 
     # Verificar si hay puntos máximos disponibles
-    if max_points.empty:
+    if not es_max.any():
         print("No hay puntos máximos disponibles para generar el polígono.")
-        return
-
-    # Reproyectar a un CRS proyectado para medir distancias
-    projected_gdf = available_points.copy()
-    max_points_proj = projected_gdf[projected_gdf['type'] == 'Max'].sort_values(by='x')
-    min_points_proj = projected_gdf[projected_gdf['type'] == 'Min']
-
-    # Ordenar puntos máximos
-    ordered_points = [max_points_proj.iloc[0]]
-    remaining_max_points = max_points_proj.iloc[1:].copy()
-
-    while not remaining_max_points.empty:
-        last_point = ordered_points[-1].geometry
-        distances = remaining_max_points.distance(last_point)
-
-        # Seleccionar el punto más cercano
-        next_point_index = distances.idxmin()
-        next_point = remaining_max_points.loc[next_point_index]
-        ordered_points.append(next_point)
-        remaining_max_points = remaining_max_points.drop(next_point.name)
-
-    # Agregar puntos mínimos en orden
-    remaining_min_points = min_points_proj.copy()
-    while not remaining_min_points.empty:
-        last_point = ordered_points[-1].geometry
-        distances = remaining_min_points.distance(last_point)
-
-        # Seleccionar el punto más cercano
-        next_point_index = distances.idxmin()
-        next_point = remaining_min_points.loc[next_point_index]
-        ordered_points.append(next_point)
-        remaining_min_points = remaining_min_points.drop(next_point.name)
+        return None
 
-    # Cerrar el polígono uniendo el último punto mínimo al primer punto máximo
-    polygon_points = [point.geometry for point in ordered_points] + [ordered_points[0].geometry]
-    polygon_geom = Polygon([[p.x, p.y] for p in polygon_points])
+    if modo == 'concavo':
+        polygon_geom = shapely.concave_hull(shapely.multipoints(coordenadas), ratio=ratio)
+    else:
+        polygon_geom = Polygon(anillo_vecino_mas_cercano(coordenadas[es_max], coordenadas[~es_max]))
 
     # Crear GeoDataFrame para el polígono
-    area_gdf = gpd.GeoDataFrame(geometry=[polygon_geom], crs=projected_gdf.crs)
+    area_gdf = gpd.GeoDataFrame(geometry=[polygon_geom], crs=points_gdf.crs)
 
-    # Guardar como KML
-    area_gdf.to_file(os.path.join(script_dir, 'Volumen de obra', 'Area.kml'), driver='KML')
+    # Guardar como KML (el driver KML no sobrescribe un archivo existente)
+    area_kml_path = os.path.join(carpeta, 'Area.kml')
+    if os.path.exists(area_kml_path):
+        os.remove(area_kml_path)
+    area_gdf.to_file(area_kml_path, driver='KML')
     print("Polígono generado y guardado como 'Area.kml'.")
 
     # Calcular el área en km² y hectáreas
@@ -172,66 +172,192 @@ def generate_polygon(event):
     area_ha = area_km2 / 10000  # Convertir a hectáreas
 
     # Guardar el área en un archivo de texto
+    area_txt_path = os.path.join(carpeta, 'Área.txt')
     with open(area_txt_path, 'w') as area_file:
         area_file.write(f"Área en km²: {area_km2:.3f}\n")
         area_file.write(f"Área en hectáreas: {area_ha:.3f}\n")
     print(f"Archivo de área guardado en {area_txt_path}.")
-
-# Configuración del gráfico y los botones
-fig, ax = plt.subplots()
-points_gdf.plot(ax=ax, color='blue', label='Puntos Máximos y Mínimos')
-plt.title("Selecciona los puntos para excluir", pad=20)
-plt.xlabel("Coordenada X")
-plt.ylabel("Coordenada Y")
-
-# Agregar interacción
-zoom_factory(ax)
-pan = panhandler(fig)  # Conectar a la figura en lugar de a los ejes
-
-# Crear el RectangleSelector
-rect_selector = RectangleSelector(ax, onselect, useblit=True,
-                                  button=[1], minspanx=5, minspany=5, spancoords='pixels')
-
-ax_button_unmark = plt.axes([0.91, 0.01, 0.1, 0.075])
-button_unmark = Button(ax_button_unmark, 'Desmarcar')
-button_unmark.on_clicked(on_button_unmark)
-
-ax_button_export = plt.axes([0.01, 0.01, 0.1, 0.075])
-button_export = Button(ax_button_export, 'Exportar')
-button_export.on_clicked(on_button_export)
-
-ax_button_generate_polygon = plt.axes([0.11, 0.01, 0.1, 0.075])
-button_generate_polygon = Button(ax_button_generate_polygon, 'Generar Polígono')
-button_generate_polygon.on_clicked(generate_polygon)
-
-plt.show()
-
-# Generar KML de Lineas y archivo VolumenTotal.txt al final
-lineas_gdf = lineas_gdf.to_crs(epsg=4326)
-kml_doc = KML.kml(
-    KML.Document(
-        KML.name("Lineas"),
-        *[KML.Placemark(
-            KML.name(f"Linea {row['ID']}"),
-            KML.description(
-                f"Dirección: {row['dirección']}\n"
-                f"Longitud: {row['Long_km']:.3f} km\n" +
-                "\n".join([f"{col}: {row[col]}" for col in lineas_gdf.columns if col not in ['geometry', 'ID', 'dirección', 'Long_km']])
-            ),
-            KML.LineString(
-                KML.coordinates(" ".join(f"{x},{y}" for x, y in row.geometry.coords))
-            )
-        ) for _, row in lineas_gdf.iterrows()]
-    )
-)
-with open(kml_path, "wb") as kml_file:
-    kml_file.write(etree.tostring(kml_doc, pretty_print=True))
-print(f"Archivo KML de Lineas guardado en {kml_path}.")
-
-with open(volumen_total_path, 'w') as volumen_total_file:
-    volumen_total_file.write("Volumen de Obra:\n")
-    total_km = lineas_gdf['Long_km'].sum()
-    for _, row in lineas_gdf.iterrows():
-        volumen_total_file.write(f"Linea {row['ID']}: {row['Long_km']:.3f} km\n")
-    volumen_total_file.write(f"\nTotal de Longitud en km: {total_km:.3f}\n")
-print(f"Archivo VolumenTotal.txt guardado en {volumen_total_path}.")
+    return area_gdf
+
+# Ventana interactiva para seleccionar los puntos a excluir; devuelve los índices seleccionados.
+# La selección es una máscara booleana sobre arreglos de coordenadas. Los puntos son una colección
+# fija (parte del fondo) y los seleccionados una colección animada de un solo color encima: cada
+# selección solo actualiza sus coordenadas y se redibuja con blitting. Con un color por colección
+# matplotlib dibuja los marcadores en bloque; colores por punto lo obligan a dibujarlos uno a uno.
+# matplotlib se importa aquí para que las funciones sin interfaz (Pipeline.py) no lo requieran.
+def seleccionar_puntos(points_gdf, carpeta=carpeta_volumen, modo='vecino', ratio=0.3):
+    import matplotlib.pyplot as plt
+    from mpl_interactions import panhandler, zoom_factory
+    from matplotlib.widgets import RectangleSelector, Button
+
+    # Coordenadas y máscara de selección de puntos
+    coordenadas = shapely.get_coordinates(points_gdf.geometry.values)
+    x, y = coordenadas[:, 0], coordenadas[:, 1]
+    seleccion = np.zeros(len(points_gdf), dtype=bool)
+    fondo = None
+
+    def selected_points():
+        return points_gdf.index[seleccion].tolist()
+
+    # Funciones de selección de puntos
+    def onselect(eclick, erelease):
+        x_min, x_max = sorted([eclick.xdata, erelease.xdata])
+        y_min, y_max = sorted([eclick.ydata, erelease.ydata])
+
+        seleccion[(x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max)] = True
+        update_plot()
+
+    # Guardar el fondo sin la selección después de cada dibujo completo (zoom, desplazamiento, ventana)
+    def on_draw(event):
+        nonlocal fondo
+        fondo = fig.canvas.copy_from_bbox(ax.bbox)
+        ax.draw_artist(marcados)
+
+    def update_plot():
+        marcados.set_offsets(coordenadas[seleccion])
+        if fondo is None:
+            fig.canvas.draw_idle()
+            return
+        fig.canvas.restore_region(fondo)
+        ax.draw_artist(marcados)
+        fig.canvas.blit(ax.bbox)
+
+    # Funciones de botones
+    def on_button_unmark(event):
+        seleccion[:] = False
+        update_plot()
+
+    def on_button_export(event):
+        export_points(points_gdf, selected_points(), carpeta)
+
+    # Función para generar el polígono
+    def generate_polygon(event):
+        generar_poligono(points_gdf, selected_points(), carpeta, modo, ratio)
+
+    # Configuración del gráfico y los botones
+    fig, ax = plt.subplots()
+    ax.scatter(x, y, s=20, color='blue', label='Puntos Máximos y Mínimos')
+    marcados = ax.scatter(np.empty(0), np.empty(0), s=20, color='red', animated=True)
+    ax.legend(loc='upper right')
+    plt.title("Selecciona los puntos para excluir", pad=20)
+    plt.xlabel("Coordenada X")
+    plt.ylabel("Coordenada Y")
+    fig.canvas.mpl_connect('draw_event', on_draw)
+
+    # Agregar interacción. El manejador de desplazamiento y el selector se guardan en la figura:
+    # matplotlib solo guarda referencias débiles y sin ellas se recolectarían al salir de esta función
+    zoom_factory(ax)
+    fig._pan = panhandler(fig)  # Conectar a la figura en lugar de a los ejes
+
+    # Crear el RectangleSelector
+    fig._selector = RectangleSelector(ax, onselect, useblit=True,
+                                      button=[1], minspanx=5, minspany=5, spancoords='pixels')
+
+    ax_button_unmark = plt.axes([0.91, 0.01, 0.1, 0.075])
+    button_unmark = Button(ax_button_unmark, 'Desmarcar')
+    button_unmark.on_clicked(on_button_unmark)
+
+    ax_button_export = plt.axes([0.01, 0.01, 0.1, 0.075])
+    button_export = Button(ax_button_export, 'Exportar')
+    button_export.on_clicked(on_button_export)
+
+    ax_button_generate_polygon = plt.axes([0.11, 0.01, 0.1, 0.075])
+    button_generate_polygon = Button(ax_button_generate_polygon, 'Generar Polígono')
+    button_generate_polygon.on_clicked(generate_polygon)
+
+    plt.show()
+    return selected_points()
+
+# Texto de <coordinates> ("lon,lat lon,lat ...") de cada línea en EPSG:4326.
+# Las coordenadas se reproyectan y se convierten a texto en bloque; solo la unión por línea es un bucle.
+def coordenadas_kml(geometrias, crs):
+    coordenadas, indices = shapely.get_coordinates(geometrias, return_index=True)
+    x, y = coordenadas[:, 0], coordenadas[:, 1]
+    if crs is not None:
+        x, y = transformar_coordenadas(x, y, crs, "EPSG:4326")
+    pares = np.char.add(np.char.add(np.asarray(x).astype(str), ','), np.asarray(y).astype(str)).tolist()
+    limites = np.searchsorted(indices, np.arange(len(geometrias) + 1)).tolist()
+    return [" ".join(pares[a:b]) for a, b in zip(limites[:-1], limites[1:])]
+
+# Escribir Lineas.kml (o .kmz si la ruta termina en .kmz) y VolumenTotal.txt en una sola pasada.
+# Los Placemark se generan por bloques de líneas y se escriben a medida con etree.xmlfile,
+# sin construir el documento completo en memoria. En un KMZ el KML se escribe directo al zip (doc.kml).
+@instrumentado('exportacion_kml', archivo='kml_path')
+def exportar_lineas(lineas_gdf, kml_path, volumen_total_path):
+    otras = [c for c in lineas_gdf.columns if c not in [lineas_gdf.geometry.name, 'ID', 'dirección', 'Long_km']]
+    etapa_actual().contar(lineas=len(lineas_gdf))
+
+    def escribir(destino, volumen_total_file):
+        total_km = 0.0
+        with etree.xmlfile(destino, encoding='utf-8') as xf:
+            xf.write_declaration()
+            with xf.element(f'{{{KML_NS}}}kml', nsmap={None: KML_NS}):
+                xf.write('\n')
+                with xf.element('Document'):
+                    xf.write('\n', E.name("Lineas"), '\n')
+                    for inicio in range(0, len(lineas_gdf), LINEAS_POR_BLOQUE):
+                        bloque = lineas_gdf.iloc[inicio:inicio + LINEAS_POR_BLOQUE]
+                        coordenadas = coordenadas_kml(bloque.geometry.values, lineas_gdf.crs)
+                        ids = bloque['ID'].tolist()
+                        longitudes = bloque['Long_km'].tolist()
+                        columnas = zip(bloque['dirección'].tolist(), *(bloque[c].tolist() for c in otras))
+                        for id_linea, long_km, (direccion, *valores), coords in zip(ids, longitudes, columnas, coordenadas):
+                            descripcion = f"Dirección: {direccion}\nLongitud: {long_km:.3f} km\n" + \
+                                "\n".join(f"{col}: {valor}" for col, valor in zip(otras, valores))
+                            xf.write(E.Placemark(
+                                E.name(f"Linea {id_linea}"),
+                                E.description(descripcion),
+                                E.LineString(E.coordinates(coords))
+                            ), pretty_print=True)
+                            volumen_total_file.write(f"Linea {id_linea}: {long_km:.3f} km\n")
+                        total_km += bloque['Long_km'].sum()
+        return total_km
+
+    comprimir = kml_path.lower().endswith('.kmz')
+    with open(volumen_total_path, 'w') as volumen_total_file:
+        volumen_total_file.write("Volumen de Obra:\n")
+        if comprimir:
+            with zipfile.ZipFile(kml_path, 'w', compression=zipfile.ZIP_DEFLATED) as kmz, kmz.open('doc.kml', 'w') as destino:
+                total_km = escribir(destino, volumen_total_file)
+        else:
+            total_km = escribir(kml_path, volumen_total_file)
+        volumen_total_file.write(f"\nTotal de Longitud en km: {total_km:.3f}\n")
+    print(f"Archivo {'KMZ' if comprimir else 'KML'} de Lineas guardado en {kml_path}.")
+    print(f"Archivo VolumenTotal.txt guardado en {volumen_total_path}.")
+
+# Preguntar cómo construir el polígono de área; devuelve (modo, ratio)
+def pedir_modo_poligono():
+    while True:
+        opcion = input("Polígono de área:\n1. Vecino más cercano (máximos y mínimos)\n2. Envolvente cóncava\nIngrese su opción (1 o 2, vacío para 1): ").strip()
+        if opcion in ('', '1'):
+            return 'vecino', 0.3
+        if opcion == '2':
+            break
+        print("Opción no válida, por favor ingrese 1 o 2.")
+    while True:
+        ratio = input("Ratio de la envolvente cóncava (0 a 1, 1 = convexa, vacío para 0.3): ").strip()
+        if not ratio:
+            return 'concavo', 0.3
+        try:
+            ratio = float(ratio)
+        except ValueError:
+            ratio = -1
+        if 0 <= ratio <= 1:
+            return 'concavo', ratio
+        print("Por favor, ingrese un número entre 0 y 1.")
+
+def calcular_volumen(carpeta=carpeta_volumen):
+    lineas_gdf = leer_lineas(carpeta)
+    lineas_gdf['Long_km'] = lineas_gdf.geometry.length / 1000  # Longitud en km
+
+    points_gdf = puntos_extremos(lineas_gdf)
+    modo, ratio = pedir_modo_poligono()
+    seleccionar_puntos(points_gdf, carpeta, modo, ratio)
+
+    # Generar KML (o KMZ) de Lineas y archivo VolumenTotal.txt al final
+    comprimir = input("¿Desea guardar las líneas como KMZ comprimido? (si/no): ").strip().lower() == 'si'
+    exportar_lineas(lineas_gdf, os.path.join(carpeta, 'Lineas.kmz' if comprimir else 'Lineas.kml'),
+                    os.path.join(carpeta, 'VolumenTotal.txt'))
+
+if __name__ == '__main__':
+    calcular_volumen()
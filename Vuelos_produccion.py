@@ -1,9 +1,17 @@
 import pandas as pd
 import geopandas as gpd
-from shapely.geometry import Point, LineString
 import glob
 import os
 import numpy as np
+import shapely
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from Proyecciones import reproyectar_geometrias
+from Puntos_GNSS import leer_gnss
+from Cache_GNSS import cache_activa, cargar_entrada
+from Formatos import pedir_formato, ruta_capa, escribir_capa, admite_anexar, FORMATO_PREDETERMINADO
+from Instrumentacion import etapa, etapa_actual, instrumentado
 
 # Función para calcular el rumbo entre dos puntos
 def calcular_rumbo(p_actual, p_siguiente):
@@ -30,6 +38,341 @@ def clasificar_rumbo_en_grupo(rumbo):
 
     return None
 
+# Versión vectorizada de calcular_rumbo: rumbos de todos los puntos en una sola pasada
+def calcular_rumbos(x, y):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(x) == 0:
+        return np.array([], dtype=float)
+
+    dx = np.diff(x)
+    dy = np.diff(y)
+    rumbos = np.degrees(np.arctan2(dy, dx)) % 360
+    rumbos[(dx == 0) & (dy == 0)] = np.nan  # Puntos duplicados, no hay rumbo
+
+    # El último punto conserva el rumbo del penúltimo
+    return np.append(rumbos, rumbos[-1] if len(rumbos) else np.nan)
+
+# Versión vectorizada de clasificar_rumbo_en_grupo: NaN donde no hay rumbo
+def clasificar_rumbos_en_grupos(rumbos):
+    rumbos = np.asarray(rumbos, dtype=float)
+    grupos = np.full(rumbos.shape, np.nan)
+    validos = ~np.isnan(rumbos)
+    r = rumbos[validos]
+
+    g = np.ceil((r - 5) / 10) * 10
+    # Corregir redondeos en los bordes para respetar grupo - 5 < rumbo <= grupo + 5
+    g = np.where(r > g + 5, g + 10, g)
+    g = np.where(r <= g - 5, g - 10, g)
+    g[(r <= 5) | (r > 355)] = 360
+
+    grupos[validos] = g
+    return grupos
+
+# Rumbo y grupo de 10° para una trayectoria completa (columnas 'rumbo' y 'grupo')
+@instrumentado('rumbos_y_grupos')
+def calcular_rumbos_y_grupos(x, y):
+    etapa_actual().contar(puntos=len(x))
+    rumbos = calcular_rumbos(x, y)
+    return rumbos, clasificar_rumbos_en_grupos(rumbos)
+
+# Codificación por corridas (run-length) de la máscara 'Fil': equivale al contador 'fil2'
+# Devuelve ids (1..n), longitudes e índices de inicio/fin (fin exclusivo) de cada segmento
+def segmentar_corridas(mascara):
+    mascara = np.asarray(mascara, dtype=bool)
+    bordes = np.diff(np.concatenate(([0], mascara.view(np.int8), [0])))
+    inicios = np.flatnonzero(bordes == 1)
+    finales = np.flatnonzero(bordes == -1)
+    longitudes = finales - inicios
+    ids = np.arange(1, len(inicios) + 1)
+    return ids, longitudes, inicios, finales
+
+# Conservar solo los segmentos con al menos (mayor_conteo - mayor_conteo // 3) puntos
+def filtrar_segmentos(ids, longitudes, inicios, finales):
+    if len(longitudes) == 0:
+        return ids, longitudes, inicios, finales
+
+    mayor_conteo = longitudes.max()
+    limite_conservacion = mayor_conteo - mayor_conteo // 3
+    conservar = longitudes >= limite_conservacion
+    return ids[conservar], longitudes[conservar], inicios[conservar], finales[conservar]
+
+# Máscara booleana de las filas que pertenecen a los segmentos indicados
+def filas_de_segmentos(inicios, finales, n):
+    marcas = np.zeros(n + 1, dtype=np.int64)
+    np.add.at(marcas, inicios, 1)
+    np.add.at(marcas, finales, -1)
+    return np.cumsum(marcas[:-1]) > 0
+
+# Construir un LineString por segmento directamente a partir de los desplazamientos
+@instrumentado('construccion_lineas')
+def construir_lineas(x, y, inicios, finales):
+    etapa_actual().contar(lineas=len(inicios))
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    filas = filas_de_segmentos(inicios, finales, len(x))
+    indices = np.repeat(np.arange(len(inicios)), finales - inicios)
+    return shapely.linestrings(x[filas], y[filas], indices=indices)
+
+# Dirección del vuelo a partir de los valores 'Fil' de los segmentos conservados
+def determinar_direccion(fil_values):
+    if any(fil in [180, 360] for fil in fil_values):
+        return 'E - W'
+    elif any(fil in [90, 270] for fil in fil_values):
+        return 'N - S'
+    return 'Dirección desconocida'
+
+# GeoDataFrame de líneas de producción reproyectado, con longitud, ID y dirección
+def lineas_a_gdf(lineas, direction, SRC_asignado, id_inicial=1):
+    gdf_lineas = gpd.GeoDataFrame(geometry=reproyectar_geometrias(lineas, "EPSG:4326", SRC_asignado), crs=SRC_asignado)
+    gdf_lineas['long_km'] = gdf_lineas.length / 1000
+    gdf_lineas['ID'] = range(id_inicial, id_inicial + len(gdf_lineas))
+    gdf_lineas['dirección'] = direction
+    return gdf_lineas[['ID', 'dirección', 'long_km', 'geometry']]
+
+# Líneas de producción de un vuelo leyendo el archivo completo en memoria
+# Devuelve (dirección, GeoDataFrame de líneas) o None si el archivo no tiene suficientes columnas;
+# el aviso lo imprime quien llama, en el orden de los archivos
+@instrumentado('lineas_de_vuelo', archivo='archivo')
+def lineas_de_vuelo(archivo, SRC_asignado, cor_x, cor_y, cor_z, filas_a_eliminar):
+    # Eliminar las filas iniciales y las épocas con Z negativa (lectura a través de la caché binaria)
+    coordenadas = leer_gnss(archivo, cor_x, cor_y, cor_z, filas_a_eliminar, filtrar_z=True)
+    if coordenadas is None:
+        return None
+
+    df_coordenadas = pd.DataFrame(dict(zip(['X', 'Y', 'Z'], coordenadas)))
+    df_coordenadas['X'] = df_coordenadas['X'].round(9)
+    df_coordenadas['Y'] = df_coordenadas['Y'].round(6)
+    df_coordenadas = df_coordenadas.drop_duplicates().reset_index(drop=True)
+
+    rumbos, grupos = calcular_rumbos_y_grupos(df_coordenadas['X'].to_numpy(), df_coordenadas['Y'].to_numpy())
+    df_coordenadas['rumbo'] = rumbos
+    df_coordenadas['grupo'] = grupos
+
+    conteo_grupos = df_coordenadas['grupo'].value_counts()
+    dos_grupos_mayor_frecuencia = conteo_grupos.nlargest(2).index.tolist()
+    valores_fil = np.where(df_coordenadas['grupo'].isin(dos_grupos_mayor_frecuencia), df_coordenadas['grupo'], np.nan)
+    df_coordenadas['Fil'] = valores_fil
+
+    with etapa('segmentacion_fil2') as medicion:
+        segmentos = segmentar_corridas(~np.isnan(valores_fil))
+        _, _, inicios, finales = filtrar_segmentos(*segmentos)
+        medicion.contar(segmentos=len(segmentos[0]), conservados=len(inicios))
+
+    fil_values = np.unique(valores_fil[filas_de_segmentos(inicios, finales, len(valores_fil))])
+    direction = determinar_direccion(fil_values)
+
+    lineas = construir_lineas(df_coordenadas['X'].to_numpy(), df_coordenadas['Y'].to_numpy(), inicios, finales)
+    return direction, lineas_a_gdf(lineas, direction, SRC_asignado)
+
+# Procesar un vuelo en memoria y escribir su capa de líneas
+# Devuelve (dirección, suma de longitudes) o None si el archivo no se puede procesar
+def procesar_vuelo(archivo, ruta_salida, SRC_asignado, cor_x, cor_y, cor_z, filas_a_eliminar):
+    resultado = lineas_de_vuelo(archivo, SRC_asignado, cor_x, cor_y, cor_z, filas_a_eliminar)
+    if resultado is None:
+        return None
+
+    direction, gdf_lineas = resultado
+    escribir_capa(gdf_lineas, ruta_salida)
+    return direction, gdf_lineas['long_km'].sum()
+
+# Bloques crudos de X, Y, Z: con la caché binaria activa son cortes del memmap de cada columna;
+# sin ella (o con columnas no numéricas) se analiza el texto por bloques.
+def bloques_crudos(archivo, cor_x, cor_y, cor_z, filas_a_eliminar, tamano_bloque):
+    entrada = cargar_entrada(archivo, [cor_x, cor_y, cor_z]) if cache_activa() else None
+    if entrada is not None:
+        x, y, z = (entrada[1][c][filas_a_eliminar:] for c in (cor_x, cor_y, cor_z))
+        for desde in range(0, len(z), tamano_bloque):
+            yield x[desde:desde + tamano_bloque], y[desde:desde + tamano_bloque], z[desde:desde + tamano_bloque]
+        return
+
+    with pd.read_csv(archivo, sep=r'\s+', header=None, skiprows=filas_a_eliminar,
+                     usecols=[cor_x, cor_y, cor_z], chunksize=tamano_bloque) as lector:
+        for bloque in lector:
+            yield bloque[cor_x].to_numpy(dtype=float), bloque[cor_y].to_numpy(dtype=float), bloque[cor_z].to_numpy(dtype=float)
+
+# Lectura por bloques de tamaño fijo con la misma limpieza que la lectura completa.
+# Los puntos repetidos se eliminan de forma consecutiva (arrastrando el último punto
+# entre bloques): un drop_duplicates global requeriría memoria proporcional al archivo.
+def leer_bloques_coordenadas(archivo, cor_x, cor_y, cor_z, filas_a_eliminar, tamano_bloque):
+    ultimo = np.full((1, 3), np.nan)
+    for x, y, z in bloques_crudos(archivo, cor_x, cor_y, cor_z, filas_a_eliminar, tamano_bloque):
+        validos = z >= 0
+        if not validos.any():
+            continue
+
+        xyz = np.column_stack((np.round(x[validos], 9), np.round(y[validos], 6), z[validos]))
+        repetidos = np.all(xyz == np.vstack((ultimo, xyz[:-1])), axis=1)
+        ultimo = xyz[-1:]
+        xyz = xyz[~repetidos]
+        if len(xyz):
+            yield xyz[:, 0], xyz[:, 1]
+
+# Rumbos y grupos por bloque: el último punto de cada bloque queda pendiente hasta
+# conocer el primer punto del siguiente, así los rumbos coinciden con la lectura completa
+def grupos_por_bloques(bloques):
+    pendiente_x = np.empty(0)
+    pendiente_y = np.empty(0)
+    ultimo_grupo = np.nan
+    for x, y in bloques:
+        x = np.concatenate((pendiente_x, x))
+        y = np.concatenate((pendiente_y, y))
+        if len(x) < 2:
+            pendiente_x, pendiente_y = x, y
+            continue
+
+        grupos = clasificar_rumbos_en_grupos(calcular_rumbos(x, y)[:-1])
+        yield x[:-1], y[:-1], grupos
+        pendiente_x, pendiente_y = x[-1:], y[-1:]
+        ultimo_grupo = grupos[-1]
+
+    # El último punto de la trayectoria conserva el grupo del penúltimo
+    if len(pendiente_x):
+        yield pendiente_x, pendiente_y, np.array([ultimo_grupo])
+
+# Procesar un vuelo por bloques: la memoria depende del tamaño de bloque y no del archivo.
+# 1) Se lee el texto una sola vez; X/Y y el grupo de cada punto se guardan en binario temporal.
+# 2) Con los dos grupos más frecuentes se segmenta por corridas arrastrando la corrida abierta.
+# 3) Las líneas conservadas se construyen y se escriben por lotes a medida que se completan.
+@instrumentado('vuelo_por_bloques', archivo='archivo')
+def procesar_vuelo_por_bloques(archivo, ruta_salida, SRC_asignado, cor_x, cor_y, cor_z, filas_a_eliminar, tamano_bloque):
+    if pd.read_csv(archivo, sep=r'\s+', header=None, skiprows=filas_a_eliminar, nrows=1).shape[1] < 5:
+        return None
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(ruta_salida)) as carpeta_temporal:
+        ruta_xy = os.path.join(carpeta_temporal, 'xy.bin')
+        ruta_clases = os.path.join(carpeta_temporal, 'clases.bin')
+
+        # Clase = grupo / 10 (1..36); 0 indica punto sin rumbo
+        conteo = np.zeros(37, dtype=np.int64)
+        primera_aparicion = np.full(37, np.iinfo(np.int64).max)
+        n = 0
+        with open(ruta_xy, 'wb') as f_xy, open(ruta_clases, 'wb') as f_clases:
+            bloques = leer_bloques_coordenadas(archivo, cor_x, cor_y, cor_z, filas_a_eliminar, tamano_bloque)
+            for x, y, grupos in grupos_por_bloques(bloques):
+                clases = np.nan_to_num(grupos / 10, nan=0).astype(np.int16)
+                np.column_stack((x, y)).tofile(f_xy)
+                clases.tofile(f_clases)
+
+                conteo += np.bincount(clases, minlength=37)
+                presentes, indices = np.unique(clases, return_index=True)
+                primera_aparicion[presentes] = np.minimum(primera_aparicion[presentes], n + indices)
+                n += len(clases)
+
+        # Dos grupos más frecuentes; los empates se resuelven por primera aparición como value_counts
+        candidatas = np.flatnonzero(conteo[1:]) + 1
+        orden = np.lexsort((primera_aparicion[candidatas], -conteo[candidatas]))
+        dos_clases = candidatas[orden][:2]
+
+        # La corrida abierta al final de un bloque se arrastra al siguiente
+        inicios, longitudes, presencia = [], [], []
+        abierta = None
+        if n:
+            clases = np.memmap(ruta_clases, dtype=np.int16, mode='r')
+            for desde in range(0, n, tamano_bloque):
+                bloque = np.asarray(clases[desde:desde + tamano_bloque])
+                mascara = np.isin(bloque, dos_clases)
+                _, largos, ini, fin = segmentar_corridas(mascara)
+
+                # Presencia de cada uno de los dos grupos dentro de cada corrida
+                acumulado = np.cumsum(bloque[:, None] == dos_clases[None, :], axis=0)
+                acumulado = np.vstack((np.zeros((1, len(dos_clases)), dtype=acumulado.dtype), acumulado))
+                tiene = (acumulado[fin] - acumulado[ini]) > 0
+                ini = ini + desde
+
+                if abierta is not None:
+                    if len(ini) and ini[0] == desde:
+                        ini[0] = abierta[0]
+                        largos[0] += abierta[1]
+                        tiene[0] |= abierta[2]
+                    else:
+                        inicios.append(np.array([abierta[0]]))
+                        longitudes.append(np.array([abierta[1]]))
+                        presencia.append(abierta[2][None, :])
+                    abierta = None
+
+                if mascara[-1]:
+                    abierta = (ini[-1], largos[-1], tiene[-1])
+                    ini, largos, tiene = ini[:-1], largos[:-1], tiene[:-1]
+
+                inicios.append(ini)
+                longitudes.append(largos)
+                presencia.append(tiene)
+            del clases
+
+        if abierta is not None:
+            inicios.append(np.array([abierta[0]]))
+            longitudes.append(np.array([abierta[1]]))
+            presencia.append(abierta[2][None, :])
+
+        inicios = np.concatenate(inicios) if inicios else np.empty(0, dtype=np.int64)
+        longitudes = np.concatenate(longitudes) if longitudes else np.empty(0, dtype=np.int64)
+        presencia = np.concatenate(presencia) if presencia else np.empty((0, len(dos_clases)), dtype=bool)
+        finales = inicios + longitudes
+
+        ids = np.arange(1, len(inicios) + 1)
+        ids, _, inicios, finales = filtrar_segmentos(ids, longitudes, inicios, finales)
+        etapa_actual().contar(filas=n, segmentos=len(longitudes), lineas=len(inicios))
+        presentes = presencia[ids - 1].any(axis=0) if len(ids) else np.zeros(len(dos_clases), dtype=bool)
+        direction = determinar_direccion(dos_clases[presentes] * 10)
+
+        # Construir y escribir las líneas por lotes de hasta tamano_bloque puntos.
+        # Los formatos que no admiten anexar (GeoParquet, FlatGeobuf) se escriben una sola vez al final.
+        anexar = admite_anexar(ruta_salida)
+        partes = []
+        longitudes_km = []
+        lote = []
+        puntos_lote = 0
+        modo = 'w'
+        xy = np.memmap(ruta_xy, dtype=float, mode='r', shape=(n, 2)) if n else np.empty((0, 2))
+        for k, (inicio, final) in enumerate(zip(inicios, finales)):
+            lote.append(shapely.linestrings(np.asarray(xy[inicio:final])))
+            puntos_lote += final - inicio
+            if puntos_lote >= tamano_bloque or k == len(inicios) - 1:
+                gdf_lineas = lineas_a_gdf(lote, direction, SRC_asignado, id_inicial=k + 2 - len(lote))
+                if anexar:
+                    escribir_capa(gdf_lineas, ruta_salida, modo)
+                else:
+                    partes.append(gdf_lineas)
+                longitudes_km.append(gdf_lineas['long_km'].to_numpy())
+                lote, puntos_lote, modo = [], 0, 'a'
+        del xy
+
+        if partes:
+            escribir_capa(gpd.GeoDataFrame(pd.concat(partes, ignore_index=True), crs=SRC_asignado), ruta_salida)
+        elif modo == 'w':
+            escribir_capa(lineas_a_gdf([], direction, SRC_asignado), ruta_salida)
+
+    suma_longitudes = pd.Series(np.concatenate(longitudes_km) if longitudes_km else [], dtype=float).sum()
+    return direction, suma_longitudes
+
+# Procesar un archivo de vuelo capturando sus errores; se ejecuta igual en serie o en un proceso del pool
+# Devuelve (resultado, error): resultado es (dirección, suma de longitudes) o None si faltan columnas
+@instrumentado('vuelo', archivo='archivo')
+def procesar_archivo(archivo, carpeta_vuelos, SRC_asignado, cor_x, cor_y, cor_z, filas_a_eliminar, tamano_bloque=0,
+                     formato=FORMATO_PREDETERMINADO):
+    try:
+        nombre_archivo_salida = os.path.basename(archivo).replace('.txt', '_lineas')
+        ruta_salida = ruta_capa(os.path.join(carpeta_vuelos, nombre_archivo_salida), formato)
+
+        if tamano_bloque > 0:
+            resultado = procesar_vuelo_por_bloques(archivo, ruta_salida, SRC_asignado, cor_x, cor_y, cor_z, filas_a_eliminar, tamano_bloque)
+        else:
+            resultado = procesar_vuelo(archivo, ruta_salida, SRC_asignado, cor_x, cor_y, cor_z, filas_a_eliminar)
+        return resultado, None
+
+    except Exception as e:
+        etapa_actual().contar(errores=1)
+        return None, str(e)
+
+# Igual que procesar_archivo pero sin escribir: devuelve ((dirección, GeoDataFrame de líneas) o None, error).
+# Es la etapa en memoria de Pipeline.py.
+def lineas_de_archivo(archivo, SRC_asignado, cor_x, cor_y, cor_z, filas_a_eliminar):
+    try:
+        return lineas_de_vuelo(archivo, SRC_asignado, cor_x, cor_y, cor_z, filas_a_eliminar), None
+    except Exception as e:
+        return None, str(e)
+
 # Función principal para crear los shapefiles
 def crear_shps_gnss():
     ruta_directorio = os.getcwd()
@@ -57,96 +400,51 @@ def crear_shps_gnss():
 
     # Preguntar cuántas filas del inicio eliminar
     filas_a_eliminar = int(input("\n¿Cuántas filas iniciales desea eliminar? (0 para no eliminar ninguna): "))
+
+    # Lectura por bloques para archivos que no caben en memoria
+    tamano_bloque = input("\nTamaño de bloque en filas para lectura por bloques (vacío para leer cada archivo completo): ").strip()
+    tamano_bloque = int(tamano_bloque) if tamano_bloque else 0
+
+    # Procesar varios vuelos a la vez, cada uno en un proceso independiente
+    procesos = input(f"Número de procesos en paralelo (vacío para 1, este equipo tiene {os.cpu_count()} núcleos): ").strip()
+    procesos = int(procesos) if procesos else 1
+    formato = pedir_formato()
     print("\n")
 
-    for archivo in archivos_txt:
+    procesar = partial(procesar_archivo, carpeta_vuelos=carpeta_vuelos, SRC_asignado=SRC_asignado, cor_x=cor_x, cor_y=cor_y,
+                       cor_z=cor_z, filas_a_eliminar=filas_a_eliminar, tamano_bloque=tamano_bloque, formato=formato)
+
+    # Etapa de toda la ejecución (después de las preguntas); cada archivo se mide en su proceso
+    with etapa('Vuelos_produccion') as medicion:
+        # Los resultados se reportan en el orden de los archivos, tanto en serie como en paralelo
+        executor = ProcessPoolExecutor(max_workers=procesos) if procesos > 1 else None
         try:
-            df = pd.read_csv(archivo, sep=r'\s+', header=None)
-            if filas_a_eliminar > 0:
-                df = df.iloc[filas_a_eliminar:]  # Eliminar las filas iniciales
-
-            df = df[df[cor_z] >= 0]
-
-            if df.shape[1] < 5:
-                print(f"El archivo {archivo} no tiene suficientes columnas para procesar.")
-                continue
-
-            df_coordenadas = df[[cor_x, cor_y, cor_z]].copy()
-            df_coordenadas.columns = ['X', 'Y', 'Z']
-            df_coordenadas['X'] = df_coordenadas['X'].round(9)
-            df_coordenadas['Y'] = df_coordenadas['Y'].round(6)
-            df_coordenadas = df_coordenadas.drop_duplicates().reset_index(drop=True)
-
-            rumbos = []
-            for i in range(len(df_coordenadas) - 1):
-                p_actual = df_coordenadas.iloc[i][['X', 'Y']].values
-                p_siguiente = df_coordenadas.iloc[i + 1][['X', 'Y']].values
-                if np.array_equal(p_actual, p_siguiente):
-                    rumbos.append(None)
+            resultados = executor.map(procesar, archivos_txt) if executor else map(procesar, archivos_txt)
+
+            for archivo, (resultado, error) in zip(archivos_txt, resultados):
+                if error is not None:
+                    print(f"Error al procesar el archivo {archivo}: {error}")
+                    continue
+                if resultado is None:
+                    print(f"El archivo {archivo} no tiene suficientes columnas para procesar.")
                     continue
-                rumbo = calcular_rumbo(p_actual, p_siguiente)
-                rumbos.append(rumbo)
-            rumbos.append(rumbos[-1] if rumbos else None)
-
-            df_coordenadas['rumbo'] = rumbos
-
-            grupos = [clasificar_rumbo_en_grupo(rumbo) for rumbo in rumbos]
-            df_coordenadas['grupo'] = grupos
-
-            conteo_grupos = df_coordenadas['grupo'].value_counts()
-            dos_grupos_mayor_frecuencia = conteo_grupos.nlargest(2).index.tolist()
-            df_coordenadas['Fil'] = np.where(df_coordenadas['grupo'].isin(dos_grupos_mayor_frecuencia), df_coordenadas['grupo'], np.nan)
-            df_coordenadas['fil2'] = 0
-
-            conteo_actual = 1
-            for i in range(len(df_coordenadas)):
-                if pd.notna(df_coordenadas.loc[i, 'Fil']):
-                    df_coordenadas.loc[i, 'fil2'] = conteo_actual
-                elif i > 0 and pd.notna(df_coordenadas.loc[i - 1, 'Fil']):
-                    conteo_actual += 1
-
-            df_coordenadas = df_coordenadas[df_coordenadas['fil2'] != 0]
-            conteo_final = df_coordenadas['fil2'].value_counts()
-            mayor_conteo = conteo_final.max()
-            limite_conservacion = mayor_conteo - mayor_conteo // 3
-            df_coordenadas = df_coordenadas[df_coordenadas['fil2'].isin(conteo_final[conteo_final >= limite_conservacion].index)]
-
-            fil_values = df_coordenadas['Fil'].dropna().unique()
-            direction = ''
-            if any(fil in [180, 360] for fil in fil_values):
-                direction = 'E - W'
-            elif any(fil in [90, 270] for fil in fil_values):
-                direction = 'N - S'
-            else:
-                direction = 'Dirección desconocida'
-
-            lineas = [LineString(zip(grupo['X'], grupo['Y'])) for _, grupo in df_coordenadas.groupby('fil2')]
-            gdf_lineas = gpd.GeoDataFrame(geometry=lineas)
-            gdf_lineas.set_crs(epsg=4326, inplace=True)
-            gdf_lineas = gdf_lineas.to_crs(SRC_asignado)
-            gdf_lineas['long_km'] = gdf_lineas.length / 1000
-            gdf_lineas['ID'] = range(1, len(gdf_lineas) + 1)
-            gdf_lineas['dirección'] = direction
-            gdf_lineas = gdf_lineas[['ID', 'dirección', 'long_km', 'geometry']]
-
-            nombre_archivo_salida = os.path.basename(archivo).replace('.txt', '_lineas.shp')
-            ruta_salida = os.path.join(carpeta_vuelos, nombre_archivo_salida)
-            gdf_lineas.to_file(ruta_salida, driver='ESRI Shapefile')
-
-            print(f"Vuelo {os.path.basename(archivo).replace('.txt', '')} con dirección {direction} procesado correctamente")
-
-            suma_longitudes = gdf_lineas['long_km'].sum()
-            suma_total_longitudes += suma_longitudes
-
-            with open(ruta_longitudes, 'a') as f:
-                f.write(f"Vuelo: {os.path.basename(archivo).replace('.txt', '')} con dirección {direction} y longitud total de líneas de producción {suma_longitudes:.3f} km\n")
-
-        except Exception as e:
-            print(f"Error al procesar el archivo {archivo}: {str(e)}")
+                direction, suma_longitudes = resultado
+
+                print(f"Vuelo {os.path.basename(archivo).replace('.txt', '')} con dirección {direction} procesado correctamente")
+
+                suma_total_longitudes += suma_longitudes
+                medicion.contar(archivos=1)
+
+                with open(ruta_longitudes, 'a') as f:
+                    f.write(f"Vuelo: {os.path.basename(archivo).replace('.txt', '')} con dirección {direction} y longitud total de líneas de producción {suma_longitudes:.3f} km\n")
+        finally:
+            if executor:
+                executor.shutdown()
 
     print("\n")
     with open(ruta_longitudes, 'a') as f:
         f.write(f"Total de todas las longitudes: {suma_total_longitudes:.3f} km\n")
 
 # Ejecutar la función
-crear_shps_gnss()
+if __name__ == '__main__':
+    crear_shps_gnss()